@@ -0,0 +1,75 @@
+"""
+Online backfill of the `search_ticker` and `search_terms` fields of companies.
+
+Walks `companies` in `_id` order in small batches and only touches documents
+whose search keys are missing, so it is safe to run against live traffic and
+to re-run.
+
+Usage:
+    python -m app.commands.backfill_company_search --batch-size 500 --pause 0.1
+"""
+import argparse
+import asyncio
+from pymongo import UpdateOne
+from app.common.query_cache import QueryCache
+from app.conf.settings import settings
+from app.database.mongo import MongoDB
+from app.database.redis import RedisManager
+from app.models.company import Company
+
+async def backfill(batch_size: int, pause: float) -> int:
+    """
+    Fill in missing search keys in batches.
+
+    Args:
+        batch_size (int): Number of companies processed per batch.
+        pause (float): Seconds to sleep between batches to limit load.
+
+    Returns:
+        int: The number of companies updated.
+    """
+    collection = Company.get_pymongo_collection()
+    last_id = None
+    updated = 0
+
+    while True:
+        query: dict = {"search_ticker": {"$exists": False}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = await collection.find(query, {"ticker": 1, "name": 1}).sort("_id", 1).limit(batch_size).to_list()
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+
+        operations = [
+            UpdateOne(
+                {"_id": doc["_id"], "search_ticker": {"$exists": False}},
+                {"$set": Company.search_fields(doc["ticker"], doc["name"])}
+            )
+            for doc in batch
+        ]
+        result = await collection.bulk_write(operations, ordered=False)
+        updated += result.modified_count
+        print(f"Backfilled {updated} companies (last _id {last_id})")
+        await asyncio.sleep(pause)
+
+    if updated:
+        await QueryCache.invalidate([Company.collection_tag()])
+    return updated
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill company search keys.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--pause", type=float, default=0.1)
+    args = parser.parse_args()
+
+    await MongoDB.connect_db(settings.mongo_db_uri)
+    try:
+        updated = await backfill(args.batch_size, args.pause)
+        print(f"Done: {updated} companies backfilled")
+    finally:
+        await MongoDB.disconnect_db()
+        await RedisManager.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""
+Compare cache value encodings on representative company pages.
+
+For every installed serializer and compressor it reports the stored size and
+the encode/decode time of a page, which is what a cache hit pays for. It first
+prints the codec the query cache actually uses, which differs from the
+configured one when an optional codec is not installed, and marks its rows
+with `*`. Needs no database or Redis connection.
+
+Usage:
+    python -m app.commands.benchmark_cache_codec --limits 5 20 100 --rounds 200
+"""
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from app.common import codecs
+from app.common.query_cache import QueryCache
+from app.conf.settings import settings
+
+COUNTRIES = ("US", "DE", "JP", "GB", "FR", "BR", "IN", "CA")
+
+def company_page(limit: int) -> dict:
+    """
+    Build a page shaped like `Company.paginate` output.
+
+    Args:
+        limit (int): Number of companies in the page.
+
+    Returns:
+        dict: The page with `data`, `total` and `next_cursor`.
+    """
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    data = [
+        {
+            "_id": ObjectId(),
+            "ticker": f"TCK{index:04d}",
+            "name": f"Company {index} Holdings Incorporated",
+            "country": COUNTRIES[index % len(COUNTRIES)],
+            "address": f"{100 + index} Market Street, Suite {index % 50}, Springfield",
+            "created_at": now - timedelta(days=index),
+            "updated_at": now,
+        }
+        for index in range(limit)
+    ]
+    return {"data": data, "total": 10_000, "next_cursor": str(data[-1]["_id"]) if data else None}
+
+def measure(value: dict, serializer: str, compression: str, rounds: int) -> tuple[int, float, float]:
+    """
+    Encode and decode `value` repeatedly.
+
+    Returns:
+        tuple[int, float, float]: Encoded size in bytes and mean encode/decode time in microseconds.
+    """
+    started = time.perf_counter()
+    for _ in range(rounds):
+        encoded = codecs.encode(value, serializer, compression, 0)
+    encode_us = (time.perf_counter() - started) / rounds * 1e6
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        codecs.decode(encoded)
+    decode_us = (time.perf_counter() - started) / rounds * 1e6
+    return len(encoded), encode_us, decode_us
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark cache serializers and compressors.")
+    parser.add_argument("--limits", type=int, nargs="+", default=[5, 20, 100])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    serializers = [name for name in codecs.SERIALIZERS if name != "raw"]
+    used = (QueryCache._serializer, QueryCache._compression)
+    configured = (settings.query_cache_serializer, settings.query_cache_compression)
+    fallback = "" if used == configured else f" (configured {'/'.join(configured)}, not installed)"
+    print(f"Query cache codec: {'/'.join(used)}{fallback}")
+    print(f"  {'limit':>5} {'serializer':<10} {'compression':<11} {'bytes':>8} {'encode us':>10} {'decode us':>10}")
+    for limit in args.limits:
+        page = company_page(limit)
+        for serializer in serializers:
+            for compression in codecs.COMPRESSORS:
+                size, encode_us, decode_us = measure(page, serializer, compression, args.rounds)
+                marker = "*" if (serializer, compression) == used else " "
+                print(f"{marker} {limit:>5} {serializer:<10} {compression:<11} {size:>8} {encode_us:>10.1f} {decode_us:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Measure how long a fresh worker takes to import the app and to serve its first request.
+
+Each round starts a new interpreter, so nothing is shared with earlier rounds
+or with this process. Import time covers `import app.main`. Time to first
+request runs uvicorn and polls `--path` until it answers, so it includes the
+lifespan (database connection, index sync unless `MONGO_SYNC_INDEXES=false`,
+and hash calibration if neither `PASSWORD_HASH_COST` nor a cost shared in Redis
+exists; cache warm-up runs in the background) and needs the same environment
+as a worker. Pass thresholds to fail on regressions.
+
+Usage:
+    python -m app.commands.benchmark_startup --rounds 5 --max-import-ms 1500 --max-ready-ms 5000
+    python -m app.commands.benchmark_startup --import-only --top 15
+"""
+import argparse
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+IMPORT_SNIPPET = "import time; started = time.perf_counter(); import app.main; print(time.perf_counter() - started)"
+
+def import_seconds() -> float:
+    """Return the seconds a fresh interpreter takes to import `app.main`."""
+    output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+def slowest_imports(top: int) -> list[tuple[int, str]]:
+    """
+    Return the modules with the largest cumulative import time, from `-X importtime`.
+
+    Returns:
+        list[tuple[int, str]]: Cumulative microseconds and module name, slowest first.
+    """
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"], capture_output=True, text=True, check=True)
+    modules = []
+    for line in output.stderr.splitlines():
+        parts = line.removeprefix("import time:").split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            modules.append((int(parts[1]), parts[2].strip()))
+    return sorted(modules, reverse=True)[:top]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def ready_seconds(path: str, timeout: float) -> float:
+    """
+    Start a uvicorn worker and return the seconds until it answers its first request.
+
+    Raises:
+        TimeoutError: If the worker does not answer within `timeout` seconds.
+        RuntimeError: If the worker exits before answering.
+    """
+    port = free_port()
+    errors = tempfile.TemporaryFile(mode="w+")
+    started = time.perf_counter()
+    worker = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL,
+        stderr=errors
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if worker.poll() is not None:
+                errors.seek(0)
+                raise RuntimeError(f"Worker exited with {worker.returncode}: {errors.read()[-2000:]}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=1):
+                    return time.perf_counter() - started
+            except urllib.error.HTTPError:
+                return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"Worker did not answer within {timeout}s")
+    finally:
+        worker.terminate()
+        worker.wait()
+        errors.close()
+
+def report(name: str, samples: list[float], threshold_ms: float | None) -> bool:
+    """Print the median and worst sample; return whether the median is within the threshold."""
+    median_ms, worst_ms = statistics.median(samples) * 1000, max(samples) * 1000
+    ok = threshold_ms is None or median_ms <= threshold_ms
+    limit = "" if threshold_ms is None else f" (limit {threshold_ms:.0f} ms)"
+    print(f"{'PASS' if ok else 'FAIL'} {name}: median {median_ms:.0f} ms, worst {worst_ms:.0f} ms{limit}")
+    return ok
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark worker import time and time to first request.")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--path", default="/openapi.json", help="Path requested to detect readiness.")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--max-import-ms", type=float, default=None)
+    parser.add_argument("--max-ready-ms", type=float, default=None)
+    parser.add_argument("--import-only", action="store_true", help="Skip the time-to-first-request rounds.")
+    parser.add_argument("--top", type=int, default=0, help="Also list the N slowest imports.")
+    args = parser.parse_args()
+
+    ok = report("import app.main", [import_seconds() for _ in range(args.rounds)], args.max_import_ms)
+    if not args.import_only:
+        samples = [ready_seconds(args.path, args.timeout) for _ in range(args.rounds)]
+        ok = report(f"first request {args.path}", samples, args.max_ready_ms) and ok
+    if args.top:
+        for micros, module in slowest_imports(args.top):
+            print(f"{micros / 1000:>9.1f} ms  {module}")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
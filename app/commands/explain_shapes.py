@@ -0,0 +1,120 @@
+"""
+Check that every supported query shape is served by an index.
+
+Each shape is compiled with `CommonDocument.plan` and explained against the
+live database; the command fails unless every winning plan (on every shard)
+uses an IXSCAN and no COLLSCAN. Run it after changing indexes or criteria.
+
+Usage:
+    python -m app.commands.explain_shapes
+"""
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from typing import Any
+from bson import ObjectId
+from app.common.criteria import Criteria, FiltersDTO, OrderBy, PaginationDTO, SortDTO
+from app.common.cursor import Direction, PageCursor, encode_cursor
+from app.conf.settings import settings
+from app.database.mongo import MongoDB
+from app.models.company import Company
+
+def company_shapes() -> dict[str, Criteria]:
+    """Return the company listing shapes the API issues."""
+    now = datetime.now()
+    sort = SortDTO(field="ticker", order=OrderBy.ASC)
+
+    def cursor(field: str, order: OrderBy, value: Any, direction: Direction = "next") -> str:
+        return encode_cursor(PageCursor(field, order.value, value, ObjectId(), direction))
+
+    return {
+        "first page": Criteria(pagination=PaginationDTO(limit=20), sort_by=sort),
+        "next page": Criteria(
+            pagination=PaginationDTO(limit=20, cursor=cursor("ticker", OrderBy.ASC, "M")),
+            sort_by=sort
+        ),
+        "date window": Criteria(
+            pagination=PaginationDTO(
+                limit=20,
+                start_date=now - timedelta(days=30),
+                end_date=now
+            ),
+            sort_by=sort
+        ),
+        "descending": Criteria(
+            pagination=PaginationDTO(limit=20, cursor=cursor("ticker", OrderBy.DESC, "M")),
+            sort_by=SortDTO(field="ticker", order=OrderBy.DESC)
+        ),
+        "ticker filter": Criteria(
+            pagination=PaginationDTO(limit=20),
+            sort_by=sort,
+            filters=[FiltersDTO(query=[{"ticker": {"$in": ["AAPL", "MSFT"]}}])]
+        ),
+        "ticker and name only": Criteria(
+            pagination=PaginationDTO(limit=100),
+            sort_by=sort,
+            fields=["ticker", "name"]
+        ),
+        "by name, next page": Criteria(
+            pagination=PaginationDTO(limit=20, cursor=cursor("name", OrderBy.ASC, "M")),
+            sort_by=SortDTO(field="name", order=OrderBy.ASC)
+        ),
+        "newest first, previous page": Criteria(
+            pagination=PaginationDTO(limit=20, cursor=cursor("created_at", OrderBy.DESC, now, "prev")),
+            sort_by=SortDTO(field="created_at", order=OrderBy.DESC)
+        ),
+    }
+
+def plan_stages(explain: Any, stages: set[str] | None = None, inside: bool = False) -> set[str]:
+    """
+    Collect the stage names of every winning plan in an explain document.
+
+    Args:
+        explain (Any): The explain output, or a part of it.
+        stages (set[str] | None): Accumulator for the recursion.
+        inside (bool): Whether `explain` is part of a winning plan.
+
+    Returns:
+        set[str]: The stage names, e.g. {"LIMIT", "FETCH", "IXSCAN"}.
+    """
+    stages = set() if stages is None else stages
+    if isinstance(explain, dict):
+        if inside and isinstance(explain.get("stage"), str):
+            stages.add(explain["stage"])
+        for key, value in explain.items():
+            plan_stages(value, stages, inside or key == "winningPlan")
+    elif isinstance(explain, list):
+        for item in explain:
+            plan_stages(item, stages, inside)
+    return stages
+
+async def explain(document: type[Company], criteria: Criteria) -> tuple[str | None, set[str]]:
+    """
+    Explain the compiled pipeline of `criteria` with its chosen hint.
+
+    Returns:
+        tuple[str | None, set[str]]: The hinted index and the winning plan stages.
+    """
+    pipeline, hint = await document.plan(await document.resolve_sort(criteria))
+    collection = document.get_pymongo_collection()
+    command: dict[str, Any] = {"aggregate": collection.name, "pipeline": pipeline, "cursor": {}}
+    if hint:
+        command["hint"] = hint
+    result = await collection.database.command({"explain": command, "verbosity": "queryPlanner"})
+    return hint, plan_stages(result)
+
+async def main() -> None:
+    await MongoDB.connect_db(settings.mongo_db_uri)
+    failures = 0
+    try:
+        for name, criteria in company_shapes().items():
+            hint, stages = await explain(Company, criteria)
+            ok = "IXSCAN" in stages and "COLLSCAN" not in stages
+            failures += not ok
+            print(f"{'PASS' if ok else 'FAIL'} companies {name}: hint={hint} stages={sorted(stages)}")
+    finally:
+        await MongoDB.disconnect_db()
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""
+Online migration that backfills `Auth.profile` from the linked `users` documents.
+
+Safe to run against live traffic and to re-run: it walks `auth` in `_id` order in
+small batches, only touches documents whose profile is still missing, and never
+overwrites a profile already written by the `User` sync hook.
+
+Usage:
+    python -m app.commands.migrate_auth_profiles --batch-size 500 --pause 0.1
+"""
+import argparse
+import asyncio
+from pymongo import UpdateOne
+from app.conf.settings import settings
+from app.database.mongo import MongoDB
+from app.models.auth import Auth
+from app.models.user import User
+
+PROFILE_FIELDS = ("first_name", "last_name", "birthday")
+
+async def migrate(batch_size: int, pause: float) -> int:
+    """
+    Backfill missing profiles in batches.
+
+    Args:
+        batch_size (int): Number of Auth documents processed per batch.
+        pause (float): Seconds to sleep between batches to limit load.
+
+    Returns:
+        int: The number of Auth documents updated.
+    """
+    auth_collection = Auth.get_pymongo_collection()
+    user_collection = User.get_pymongo_collection()
+    last_id = None
+    migrated = 0
+
+    while True:
+        query: dict = {"profile": None}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = await auth_collection.find(query, {"user": 1}).sort("_id", 1).limit(batch_size).to_list()
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+
+        user_ids = [doc["user"].id for doc in batch if doc.get("user")]
+        users = {
+            user["_id"]: user
+            async for user in user_collection.find({"_id": {"$in": user_ids}}, {field: 1 for field in PROFILE_FIELDS})
+        }
+
+        operations = []
+        for doc in batch:
+            user = users.get(doc["user"].id) if doc.get("user") else None
+            profile = {field: user.get(field) for field in PROFILE_FIELDS} if user else {}
+            operations.append(UpdateOne({"_id": doc["_id"], "profile": None}, {"$set": {"profile": profile}}))
+
+        result = await auth_collection.bulk_write(operations, ordered=False)
+        migrated += result.modified_count
+        print(f"Migrated {migrated} auth profiles (last _id {last_id})")
+        await asyncio.sleep(pause)
+
+    return migrated
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill Auth.profile from the users collection.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--pause", type=float, default=0.1)
+    args = parser.parse_args()
+
+    await MongoDB.connect_db(settings.mongo_db_uri)
+    try:
+        migrated = await migrate(args.batch_size, args.pause)
+        print(f"Done: {migrated} auth profiles migrated")
+    finally:
+        await MongoDB.disconnect_db()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,52 @@
+"""
+Recompute the materialized facet counts from the collections.
+
+The counts are maintained incrementally by document hooks; this repairs them
+after writes that bypass the hooks (e.g. `find(...).update(...)` or manual
+edits) with one `$group` per faceted field, swapped in atomically.
+
+Usage:
+    python -m app.commands.rebuild_facets
+"""
+import asyncio
+from app.common.facets import FacetCounter
+from app.common.model import CommonDocument
+from app.conf.settings import settings
+from app.database.mongo import MongoDB
+from app.database.redis import RedisManager
+from app.models.auth import Auth
+from app.models.company import Company
+from app.models.user import User
+
+DOCUMENTS: list[type[CommonDocument]] = [Auth, User, Company]
+
+async def rebuild(document: type[CommonDocument], field: str) -> int:
+    """
+    Recompute the counts of one faceted field.
+
+    Args:
+        document (type[CommonDocument]): The document class.
+        field (str): A field listed in its `facet_fields`.
+
+    Returns:
+        int: The number of distinct values.
+    """
+    pipeline = [{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}]
+    cursor = await document.get_pymongo_collection().aggregate(pipeline)
+    counts = {group["_id"]: group["count"] async for group in cursor}
+    await FacetCounter.rebuild(document.get_collection_name(), field, counts)
+    return len(counts)
+
+async def main() -> None:
+    await MongoDB.connect_db(settings.mongo_db_uri)
+    try:
+        for document in DOCUMENTS:
+            for field in document.facet_fields:
+                values = await rebuild(document, field)
+                print(f"Rebuilt {document.get_collection_name()}.{field}: {values} values")
+    finally:
+        await MongoDB.disconnect_db()
+        await RedisManager.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+"""
+Shard the collections of every model that declares a `shard_key`.
+
+Enables sharding on the database, checks that each unique index is prefixed
+by the shard key (MongoDB cannot enforce it otherwise), creates the shard key
+index and shards the collection. Collections that are already sharded on the
+declared key are left alone; a different existing key is reported, since
+changing it is a `reshardCollection` decision. Run it against mongos once the
+cluster from `docker-compose.yml` is up, and again whenever a model is added.
+
+Usage:
+    python -m app.commands.shard_collections [--dry-run]
+"""
+import argparse
+import asyncio
+import sys
+from app.common.model import CommonDocument
+from app.conf.settings import settings
+from app.database.mongo import MongoDB
+from app.models.auth import Auth
+from app.models.company import Company
+from app.models.user import User
+
+DOCUMENTS: list[type[CommonDocument]] = [Auth, User, Company]
+
+async def incompatible_unique_indexes(document: type[CommonDocument]) -> list[str]:
+    """
+    Return the unique indexes whose keys do not start with the shard key fields.
+
+    Args:
+        document (type[CommonDocument]): A document class declaring a `shard_key`.
+
+    Returns:
+        list[str]: The names of the offending indexes.
+    """
+    fields = list(document.shard_fields())
+    indexes = await document.get_pymongo_collection().index_information()
+    return [
+        name
+        for name, spec in indexes.items()
+        if name != "_id_" and spec.get("unique") and [field for field, _ in spec["key"]][:len(fields)] != fields
+    ]
+
+async def shard(document: type[CommonDocument], dry_run: bool) -> bool:
+    """
+    Shard one collection on its declared key.
+
+    Args:
+        document (type[CommonDocument]): A document class declaring a `shard_key`.
+        dry_run (bool): Only report what would be done.
+
+    Returns:
+        bool: Whether the collection is (or would be) sharded on the declared key.
+    """
+    collection = document.get_pymongo_collection()
+    namespace = f"{collection.database.name}.{collection.name}"
+    key = dict(document.shard_key)
+
+    existing = await MongoDB.client.config.collections.find_one({"_id": namespace, "dropped": {"$ne": True}})
+    if existing:
+        if dict(existing["key"]) == key:
+            print(f"{namespace} already sharded on {key}")
+            return True
+        print(f"{namespace} is sharded on {dict(existing['key'])}, not the declared {key}; reshard it explicitly")
+        return False
+
+    incompatible = await incompatible_unique_indexes(document)
+    if incompatible:
+        print(f"{namespace}: unique indexes {incompatible} are not prefixed by shard key {key}")
+        return False
+
+    if dry_run:
+        print(f"{namespace} would be sharded on {key}")
+        return True
+    await collection.create_index(list(document.shard_key))
+    await MongoDB.client.admin.command("shardCollection", namespace, key=key)
+    print(f"{namespace} sharded on {key}")
+    return True
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Shard collections on their declared shard keys.")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    db = await MongoDB.connect_db(settings.mongo_db_uri)
+    failures = 0
+    try:
+        if not args.dry_run:
+            await MongoDB.client.admin.command("enableSharding", db.name)
+        for document in DOCUMENTS:
+            if document.shard_key:
+                failures += not await shard(document, args.dry_run)
+    finally:
+        await MongoDB.disconnect_db()
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,41 @@
+"""
+Create the indexes declared by every model, once, outside the workers.
+
+Run it on deploy (before rolling out workers started with
+`MONGO_SYNC_INDEXES=false`) and after changing a model's indexes, so workers
+boot without checking indexes against the cluster. Run `shard_collections`
+afterwards on a sharded cluster.
+
+Usage:
+    python -m app.commands.sync_indexes [--drop-undeclared]
+"""
+import argparse
+import asyncio
+from app.common.model import CommonDocument
+from app.conf.settings import settings
+from app.database.mongo import MongoDB
+from app.models.auth import Auth
+from app.models.company import Company
+from app.models.user import User
+
+DOCUMENTS: list[type[CommonDocument]] = [Auth, User, Company]
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Create the indexes declared by the models.")
+    parser.add_argument(
+        "--drop-undeclared",
+        action="store_true",
+        help="Also drop indexes that no model declares (e.g. after removing one)."
+    )
+    args = parser.parse_args()
+
+    await MongoDB.connect_db(settings.mongo_db_uri, sync_indexes=True, drop_indexes=args.drop_undeclared)
+    try:
+        for document in DOCUMENTS:
+            indexes = await document.get_pymongo_collection().index_information()
+            print(f"{document.get_collection_name()}: {sorted(indexes)}")
+    finally:
+        await MongoDB.disconnect_db()
+
+if __name__ == "__main__":
+    asyncio.run(main())
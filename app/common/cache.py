@@ -0,0 +1,87 @@
+import time
+from collections import OrderedDict
+from typing import Any
+
+MISSING: Any = object()
+
+class LocalCache:
+    """
+    Bounded in-process LRU cache whose entries expire at a per-entry deadline.
+
+    Values are returned as stored; callers that hand them to request handlers
+    should store immutable or serialized payloads. When `max_bytes` is set,
+    callers report each entry's size and the cache also evicts to stay under it.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int | None = None) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: OrderedDict[str, tuple[float, Any, int]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, default: Any = MISSING) -> Any:
+        """
+        Return the cached value for `key`, or `default` if absent or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value, _ = entry
+        if expires_at <= time.monotonic():
+            self.delete(key)
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: float, size: int = 0) -> None:
+        """
+        Store `value` under `key` for `ttl` seconds, evicting the least recently used entries.
+
+        Args:
+            key (str): The cache key.
+            value (Any): The value to store.
+            ttl (float): Lifetime in seconds; non-positive values are not stored.
+            size (int): Approximate size of the value in bytes, for memory accounting.
+        """
+        if ttl <= 0 or (self.max_bytes is not None and size > self.max_bytes):
+            return
+        self.delete(key)
+        self._entries[key] = (time.monotonic() + ttl, value, size)
+        self.bytes += size
+        while len(self._entries) > self.max_entries or (self.max_bytes is not None and self.bytes > self.max_bytes):
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        """Remove `key` if present."""
+        entry = self._entries.pop(key, None)
+        if entry:
+            self.bytes -= entry[2]
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Return size and hit/miss/eviction counters.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
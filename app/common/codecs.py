@@ -0,0 +1,149 @@
+import struct
+import zlib
+from datetime import datetime
+from typing import Any, Callable, NamedTuple
+import bson
+from bson import ObjectId, json_util
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # optional dependency
+    lz4_frame = None
+
+FORMAT_VERSION = 1
+_HEADER = struct.Struct(">BBB")
+
+class _Codec(NamedTuple):
+    id: int
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[bytes], Any]
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return msgpack.ExtType(1, value.binary)
+    if isinstance(value, datetime):
+        return msgpack.ExtType(2, value.isoformat().encode())
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def _msgpack_ext_hook(code: int, data: bytes) -> Any:
+    if code == 1:
+        return ObjectId(data)
+    if code == 2:
+        return datetime.fromisoformat(data.decode())
+    return msgpack.ExtType(code, data)
+
+SERIALIZERS: dict[str, _Codec] = {
+    "raw": _Codec(
+        0,
+        lambda value: value if isinstance(value, bytes) else value.encode(),
+        lambda data: data
+    ),
+    "json": _Codec(
+        1,
+        lambda value: json_util.dumps(value).encode(),
+        lambda data: json_util.loads(data)
+    ),
+    "bson": _Codec(
+        2,
+        lambda value: bson.encode({"v": value}),
+        lambda data: bson.decode(data)["v"]
+    ),
+}
+if msgpack:
+    SERIALIZERS["msgpack"] = _Codec(
+        3,
+        lambda value: msgpack.packb(value, default=_msgpack_default, use_bin_type=True),
+        lambda data: msgpack.unpackb(data, ext_hook=_msgpack_ext_hook, raw=False)
+    )
+
+COMPRESSORS: dict[str, _Codec] = {
+    "none": _Codec(0, lambda data: data, lambda data: data),
+    "zlib": _Codec(1, lambda data: zlib.compress(data, 6), zlib.decompress),
+}
+if zstandard:
+    COMPRESSORS["zstd"] = _Codec(
+        2,
+        lambda data: zstandard.ZstdCompressor(level=3).compress(data),
+        lambda data: zstandard.ZstdDecompressor().decompress(data)
+    )
+if lz4_frame:
+    COMPRESSORS["lz4"] = _Codec(3, lz4_frame.compress, lz4_frame.decompress)
+
+_SERIALIZERS_BY_ID = {codec.id: codec for codec in SERIALIZERS.values()}
+_COMPRESSORS_BY_ID = {codec.id: codec for codec in COMPRESSORS.values()}
+
+class UnsupportedCacheFormat(ValueError):
+    """Raised when a cached value was written with an unknown format or codec."""
+
+def resolve(serializer: str, compression: str) -> tuple[str, str]:
+    """
+    Fall back to always-available codecs when an optional one is not installed.
+
+    A fallback is logged, since it silently changes the size and speed of
+    every cache entry.
+
+    Args:
+        serializer (str): The configured serializer name.
+        compression (str): The configured compression name.
+
+    Returns:
+        tuple[str, str]: The usable serializer and compression names.
+    """
+    usable_serializer = serializer if serializer in SERIALIZERS else "bson"
+    usable_compression = compression if compression in COMPRESSORS else "zlib"
+    missing = [
+        name
+        for name, usable in ((serializer, usable_serializer), (compression, usable_compression))
+        if name != usable
+    ]
+    if missing:
+        print(f"Cache codec {', '.join(missing)} is not installed; using {usable_serializer}/{usable_compression}")
+    return usable_serializer, usable_compression
+
+def encode(value: Any, serializer: str, compression: str, compress_min_bytes: int) -> bytes:
+    """
+    Serialize and optionally compress a value behind a self-describing header.
+
+    The header records the format version, serializer and compressor, so values
+    written with older settings stay readable after the configuration changes.
+
+    Args:
+        value (Any): The value to encode; bytes or str with the "raw" serializer.
+        serializer (str): A key of `SERIALIZERS`.
+        compression (str): A key of `COMPRESSORS`.
+        compress_min_bytes (int): Payloads smaller than this are stored uncompressed.
+
+    Returns:
+        bytes: The encoded value.
+    """
+    codec = SERIALIZERS[serializer]
+    payload = codec.dumps(value)
+    compressor = COMPRESSORS["none"]
+    if len(payload) >= compress_min_bytes:
+        compressor = COMPRESSORS[compression]
+        payload = compressor.dumps(payload)
+    return _HEADER.pack(FORMAT_VERSION, codec.id, compressor.id) + payload
+
+def decode(data: bytes) -> Any:
+    """
+    Decode a value produced by `encode`.
+
+    Raises:
+        UnsupportedCacheFormat: If the format version or a codec is unknown here.
+    """
+    version, serializer_id, compressor_id = _HEADER.unpack_from(data)
+    codec = _SERIALIZERS_BY_ID.get(serializer_id)
+    compressor = _COMPRESSORS_BY_ID.get(compressor_id)
+    if version != FORMAT_VERSION or not codec or not compressor:
+        raise UnsupportedCacheFormat(f"format {version}, serializer {serializer_id}, compressor {compressor_id}")
+    return codec.loads(compressor.loads(data[_HEADER.size:]))
@@ -1,8 +1,121 @@
-from pydantic import Field, model_serializer
-from typing import Any
+import hashlib
+from bson import json_util
+from pydantic import Field, field_validator, model_serializer
+from typing import Any, NamedTuple
 from enum import Enum
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from .schema import CommonBaseModel
+from .cursor import Direction, PageCursor, decode_cursor, encode_cursor
+from app.exceptions.query import InvalidCursorException
+
+def bucket_datetime(value: datetime, seconds: int, round_up: bool = False) -> datetime:
+    """
+    Round a datetime down to the start of its bucket, or up to its end.
+
+    Aware datetimes are converted to UTC first, so the same instant expressed
+    in different offsets lands in the same bucket.
+
+    Args:
+        value (datetime): The datetime to round.
+        seconds (int): Bucket width in seconds; 1 or less rounds to the second.
+        round_up (bool): Return the last millisecond of the bucket instead of its
+            start, so an inclusive upper bound keeps every instant of the bucket.
+
+    Returns:
+        datetime: The start (or end) of the bucket containing `value`.
+    """
+    if value.tzinfo:
+        value = value.astimezone(timezone.utc)
+    width = timedelta(seconds=max(seconds, 1))
+    epoch = datetime(1970, 1, 1, tzinfo=value.tzinfo)
+    start = value - (value - epoch) % width
+    if round_up:
+        return start + width - timedelta(milliseconds=1)
+    return start
+
+ALLOWED_OPERATORS = frozenset({
+    "$eq", "$ne", "$gt", "$gte", "$lt", "$lte", "$in", "$nin", "$exists",
+    "$and", "$or", "$nor", "$not", "$regex", "$options", "$all", "$elemMatch", "$size",
+})
+RANGE_OPERATORS = frozenset({"$gt", "$gte", "$lt", "$lte", "$in", "$ne", "$nin", "$exists", "$regex", "$options", "$not"})
+
+class QueryShape(NamedTuple):
+    """
+    The index-relevant shape of a query: equality fields, sort fields and range fields.
+
+    An index serves the query with an IXSCAN and no in-memory sort when its keys
+    start with the equality fields followed by the sort fields (the ESR rule).
+    """
+    equality: frozenset[str]
+    sort: tuple[str, ...]
+    range: frozenset[str]
+
+def merge_matches(conditions: list[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Merge several `$match` queries into one.
+
+    Conditions on distinct fields are merged into a single flat document, which
+    keeps the query shape visible to the planner; overlapping conditions are
+    combined with `$and`.
+
+    Args:
+        conditions (list[dict[str, Any]]): The queries to combine.
+
+    Returns:
+        dict[str, Any]: The merged query, empty when there are no conditions.
+    """
+    merged: dict[str, Any] = {}
+    overlapping: list[dict[str, Any]] = []
+    pending = list(conditions)
+    while pending:
+        condition = pending.pop(0)
+        if list(condition) == ["$and"]:
+            pending[:0] = condition["$and"]
+        elif merged.keys().isdisjoint(condition):
+            merged.update(condition)
+        else:
+            overlapping.append(condition)
+
+    if overlapping:
+        merged = {"$and": [merged, *overlapping]} if merged else {"$and": overlapping}
+    return merged
+
+def query_shape(query: dict[str, Any], sort: tuple[str, ...] = ()) -> QueryShape:
+    """
+    Classify the top-level fields of a query for index selection.
+
+    Args:
+        query (dict[str, Any]): A MongoDB query.
+        sort (tuple[str, ...]): The sort fields, in order.
+
+    Returns:
+        QueryShape: The equality, sort and range fields.
+    """
+    equality: set[str] = set()
+    ranges: set[str] = set()
+    for field, value in query.items():
+        if field == "$and":
+            for condition in value:
+                shape = query_shape(condition)
+                equality |= shape.equality
+                ranges |= shape.range
+        elif field.startswith("$"):
+            continue
+        elif isinstance(value, dict) and RANGE_OPERATORS.intersection(value):
+            ranges.add(field)
+        else:
+            equality.add(field)
+    return QueryShape(frozenset(equality), sort, frozenset(ranges - equality))
+
+def _check_operators(value: Any) -> None:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key.startswith("$") and key not in ALLOWED_OPERATORS:
+                raise ValueError(f"Operator '{key}' is not allowed in filters")
+            _check_operators(item)
+    elif isinstance(value, list):
+        for item in value:
+            _check_operators(item)
 
 class LogicalOperator(Enum):
     """
@@ -40,6 +153,21 @@ class SortDTO(CommonBaseModel):
         ...,
         description="The sorting direction: ASC (1) for ascending or DESC (-1) for descending."
     )
+    tiebreak: bool = Field(
+        True,
+        description="Append `_id` to the sort so the order is total; unnecessary for unique fields."
+    )
+
+    def keys(self) -> tuple[str, ...]:
+        """
+        Return the sort keys in order, including the `_id` tie-breaker when used.
+
+        Returns:
+            tuple[str, ...]: e.g. ("created_at", "_id").
+        """
+        if self.tiebreak and self.field != "_id":
+            return (self.field, "_id")
+        return (self.field,)
 
     @model_serializer
     def to_mongo(self) -> dict[str, int]:
@@ -48,9 +176,9 @@ class SortDTO(CommonBaseModel):
 
         Returns:
             dict[str, int]: A dictionary in the format {field: order_value},
-            e.g., {"created_at": 1} for ascending sort.
+            e.g., {"created_at": 1, "_id": 1} for ascending sort.
         """
-        return {self.field: self.order.value}
+        return {key: self.order.value for key in self.keys()}
 
 
 class FiltersDTO(CommonBaseModel):
@@ -67,6 +195,18 @@ class FiltersDTO(CommonBaseModel):
         description="Logical operator used to combine conditions (AND, OR, NOR)."
     )
 
+    @field_validator("query")
+    @classmethod
+    def check_operators(cls, value: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        Reject query operators outside `ALLOWED_OPERATORS`, such as `$where` or `$expr`.
+
+        Raises:
+            ValueError: If a disallowed operator is used at any depth.
+        """
+        _check_operators(value)
+        return value
+
     @model_serializer
     def to_mongo(self) -> dict[str, Any] | None:
         """
@@ -97,11 +237,7 @@ class PaginationDTO(CommonBaseModel):
     )
     cursor: str | None = Field(
         None,
-        description="The cursor value (string) for pagination. Used for fetching the next page of results."
-    )
-    cursor_name: str | None = Field(
-        None,
-        description="The field name used as the cursor for pagination comparison."
+        description="Opaque cursor from a previous page, selecting the page after or before it."
     )
     start_date: datetime | None = Field(
         None,
@@ -112,33 +248,39 @@ class PaginationDTO(CommonBaseModel):
         description="Optional filter for documents created before this date."
     )
 
-    def to_mongo(self) -> list[dict[str, Any]]:
+    def date_match(self) -> dict[str, Any]:
         """
-        Convert pagination and date filters into MongoDB aggregation pipeline stages.
+        Build the match conditions of the date window alone.
 
         Returns:
-            list[dict[str, Any]]:
-                A list of MongoDB pipeline stages that may include:
-                - `$match` for date ranges and cursor filtering.
-                - `$limit` for limiting the number of documents.
+            dict[str, Any]: Conditions on `created_at`, empty when no window is set.
         """
-        stages = []
         match_conditions = {}
         if self.start_date:
             match_conditions["created_at"] = {"$gte": self.start_date}
         if self.end_date:
             match_conditions.setdefault("created_at", {})
             match_conditions["created_at"]["$lte"] = self.end_date
+        return match_conditions
 
-        if self.cursor and self.cursor_name:
-            match_conditions[self.cursor_name] = {"$gt": self.cursor}
+    def normalized(self, date_bucket: int) -> "PaginationDTO":
+        """
+        Return a copy whose date window is widened to whole `date_bucket` buckets.
 
-        if match_conditions:
-            stages.append({"$match": match_conditions})
+        `start_date` is rounded down to the start of its bucket and `end_date` up
+        to the end of its bucket, so the window never drops documents the
+        request asked for.
 
-        stages.append({"$limit": self.limit})
+        Args:
+            date_bucket (int): Bucket width in seconds.
 
-        return stages
+        Returns:
+            PaginationDTO: The normalized pagination.
+        """
+        return self.model_copy(update={
+            "start_date": bucket_datetime(self.start_date, date_bucket) if self.start_date else None,
+            "end_date": bucket_datetime(self.end_date, date_bucket, round_up=True) if self.end_date else None,
+        })
 
 
 class Criteria(CommonBaseModel):
@@ -158,27 +300,232 @@ class Criteria(CommonBaseModel):
         default_factory=list,
         description="A list of filtering conditions to apply."
     )
+    fields: list[str] | None = Field(
+        None,
+        description="Document fields to return; all fields when omitted."
+    )
 
     def to_pipeline(self) -> list[dict[str, Any]]:
         """
-        Build a MongoDB aggregation pipeline from the criteria.
+        Compile the criteria into a MongoDB aggregation pipeline.
+
+        All filters, the date window and the cursor are merged into a single
+        leading `$match`, followed by `$sort` and then `$limit`, so the sort can
+        be served by an index and coalesces with the limit into a top-k sort.
+        One document beyond the page is read to tell whether another page follows.
+        When paging backwards the sort is reversed; `page_documents` restores it.
 
         Returns:
             list[dict[str, Any]]:
-                The complete aggregation pipeline with `$match`, `$limit`, and `$sort`
-                stages applied according to the criteria configuration.
+                The pipeline: an optional `$match`, then `$sort` and `$limit`,
+                and a `$project` when only some fields are requested.
         """
         pipeline: list[dict[str, Any]] = []
 
-        if self.filters:
-            for f in self.filters:
-                stage = f.model_dump()
-                if stage:
-                    pipeline.append(stage)
-
-        pipeline.extend(self.pagination.to_mongo())
+        match = self.page_match()
+        if match:
+            pipeline.append({"$match": match})
 
         if self.sort_by:
-            pipeline.append({"$sort": self.sort_by.model_dump()})
+            order = self.sort_by.order.value * (-1 if self.direction() == "prev" else 1)
+            pipeline.append({"$sort": {key: order for key in self.sort_by.keys()}})
+
+        pipeline.append({"$limit": self.pagination.limit + 1})
+
+        projection = self.projection()
+        if projection:
+            pipeline.append({"$project": projection})
 
         return pipeline
+
+    def projection(self) -> dict[str, int] | None:
+        """
+        Build the projection for the requested fields.
+
+        The sort keys are always kept so cursors can be computed, and `_id` is
+        excluded unless requested or used as a tie-breaker, which lets an index
+        holding all the projected fields serve the query without fetching documents.
+
+        Returns:
+            dict[str, int] | None: The projection, or `None` when all fields are requested.
+        """
+        if not self.fields:
+            return None
+        keep = set(self.fields)
+        if self.sort_by:
+            keep.update(self.sort_by.keys())
+        projection = {field: 1 for field in sorted(keep)}
+        if "_id" not in keep:
+            projection["_id"] = 0
+        return projection
+
+    def count_match(self) -> dict[str, Any]:
+        """
+        Build the query matching every document of the result set, across all pages.
+
+        Combines the filters and the date window, leaving out the cursor and limit.
+
+        Returns:
+            dict[str, Any]: A MongoDB query, empty when nothing is filtered.
+        """
+        conditions = [
+            stage["$match"]
+            for stage in (f.model_dump() for f in self.filters or [])
+            if stage
+        ]
+        conditions.append(self.pagination.date_match())
+        return merge_matches([condition for condition in conditions if condition])
+
+    def page_cursor(self) -> PageCursor | None:
+        """
+        Decode the pagination cursor and check it belongs to the current sort.
+
+        Returns:
+            PageCursor | None: The page boundary, or `None` on the first page.
+
+        Raises:
+            InvalidCursorException: If the cursor is forged, malformed or was issued for another sort.
+        """
+        if not self.pagination.cursor:
+            return None
+        cursor = decode_cursor(self.pagination.cursor)
+        if not self.sort_by or cursor.field != self.sort_by.field or cursor.order != self.sort_by.order.value:
+            raise InvalidCursorException()
+        return cursor
+
+    def direction(self) -> Direction:
+        """Return whether the requested page follows ("next") or precedes ("prev") the cursor."""
+        cursor = self.page_cursor()
+        return cursor.direction if cursor else "next"
+
+    def cursor_match(self) -> dict[str, Any]:
+        """
+        Build the keyset condition selecting documents beyond the cursor.
+
+        With a tie-breaker the condition compares the `(value, _id)` pair, so
+        documents sharing a sort value are neither skipped nor repeated, and
+        documents inserted meanwhile do not shift page boundaries. The redundant
+        inclusive bound on the sort field gives the index scan a start key, so
+        deep pages cost the same as the first.
+
+        Returns:
+            dict[str, Any]: The cursor condition, empty on the first page.
+        """
+        cursor = self.page_cursor()
+        if not cursor:
+            return {}
+        ascending = (cursor.order == 1) == (cursor.direction == "next")
+        operator = "$gt" if ascending else "$lt"
+        if cursor.field == "_id" or not self.sort_by.tiebreak:
+            return {cursor.field: {operator: cursor.value}}
+        return {
+            cursor.field: {f"{operator}e": cursor.value},
+            "$or": [
+                {cursor.field: {operator: cursor.value}},
+                {cursor.field: cursor.value, "_id": {operator: cursor.id}},
+            ],
+        }
+
+    def page_match(self) -> dict[str, Any]:
+        """
+        Build the query selecting the current page: the result set beyond the cursor.
+
+        Returns:
+            dict[str, Any]: A MongoDB query, empty when nothing is filtered.
+        """
+        return merge_matches([condition for condition in (self.count_match(), self.cursor_match()) if condition])
+
+    def page_documents(self, documents: list[dict[str, Any]]) -> tuple[list[dict[str, Any]], str | None, str | None]:
+        """
+        Trim the documents read by `to_pipeline` to the page and compute its cursors.
+
+        Args:
+            documents (list[dict[str, Any]]): The aggregation output, in pipeline order.
+
+        Returns:
+            tuple[list[dict[str, Any]], str | None, str | None]:
+                The page in sort order, the next cursor and the previous cursor
+                (`None` where there is no such page).
+        """
+        limit = self.pagination.limit
+        has_more = len(documents) > limit
+        page = documents[:limit]
+        backwards = self.direction() == "prev"
+        if backwards:
+            page.reverse()
+        if not page or not self.sort_by:
+            return page, None, None
+
+        has_next = self.pagination.cursor is not None if backwards else has_more
+        has_prev = has_more if backwards else self.pagination.cursor is not None
+        return (
+            page,
+            self.make_cursor(page[-1], "next") if has_next else None,
+            self.make_cursor(page[0], "prev") if has_prev else None,
+        )
+
+    def make_cursor(self, document: dict[str, Any], direction: Direction) -> str:
+        """
+        Build the cursor of the page after or before `document`.
+
+        Args:
+            document (dict[str, Any]): A boundary document of the current page.
+            direction (Direction): "next" or "prev".
+
+        Returns:
+            str: The opaque cursor.
+        """
+        return encode_cursor(PageCursor(
+            self.sort_by.field,
+            self.sort_by.order.value,
+            document.get(self.sort_by.field),
+            document.get("_id"),
+            direction
+        ))
+
+    def shape(self) -> QueryShape:
+        """
+        Return the index-relevant shape of the page query.
+
+        Returns:
+            QueryShape: The equality, sort and range fields.
+        """
+        sort = self.sort_by.keys() if self.sort_by else ()
+        return query_shape(self.page_match(), sort)
+
+    def normalized(self, date_bucket: int) -> "Criteria":
+        """
+        Return a copy with the date window widened to whole `date_bucket` buckets.
+
+        Queries should run on the normalized criteria, so that requests sharing
+        a cache key also share the exact same result.
+
+        Args:
+            date_bucket (int): Bucket width in seconds.
+
+        Returns:
+            Criteria: The normalized criteria.
+        """
+        return self.model_copy(update={"pagination": self.pagination.normalized(date_bucket)})
+
+    def cache_key(self) -> dict[str, Any]:
+        """
+        Build a canonical cache key for the criteria.
+
+        Fields appear in a fixed order, and the filters are reduced to a hash of
+        their canonical (key-sorted) form, so equivalent criteria produce the same key.
+
+        Returns:
+            dict[str, Any]: The cache key parts.
+        """
+        filters = [f.model_dump() for f in self.filters or []]
+        shape = json_util.dumps(filters, sort_keys=True) if filters else None
+        return {
+            "filters": hashlib.sha1(shape.encode()).hexdigest() if shape else None,
+            "sort": [*self.sort_by.keys(), self.sort_by.order.value] if self.sort_by else None,
+            "limit": self.pagination.limit,
+            "cursor": self.pagination.cursor,
+            "start_date": self.pagination.start_date,
+            "end_date": self.pagination.end_date,
+            "fields": sorted(self.fields) if self.fields else None,
+        }
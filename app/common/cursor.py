@@ -0,0 +1,75 @@
+import base64
+import hashlib
+import hmac
+from typing import Any, Literal, NamedTuple
+from bson import json_util
+from app.conf.settings import settings
+from app.exceptions.query import InvalidCursorException
+
+Direction = Literal["next", "prev"]
+
+class PageCursor(NamedTuple):
+    """
+    Position of a page boundary in a keyset-paginated result.
+
+    Attributes:
+        field (str): The sort field.
+        order (int): The sort order, 1 or -1.
+        value (Any): The sort field value of the boundary document.
+        id (Any): The `_id` of the boundary document, breaking ties between equal values.
+        direction (Direction): Whether the cursor reads the page after or before the boundary.
+    """
+    field: str
+    order: int
+    value: Any
+    id: Any
+    direction: Direction
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(settings.secret_key.encode(), payload, hashlib.sha256).digest()[:16]
+
+def encode_cursor(cursor: PageCursor) -> str:
+    """
+    Serialize a cursor into an opaque, signed, URL-safe token.
+
+    Args:
+        cursor (PageCursor): The page boundary.
+
+    Returns:
+        str: The token.
+    """
+    payload = json_util.dumps(list(cursor), separators=(",", ":")).encode()
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload))}"
+
+def decode_cursor(token: str) -> PageCursor:
+    """
+    Verify and parse a token produced by `encode_cursor`.
+
+    Args:
+        token (str): The token received from a client.
+
+    Returns:
+        PageCursor: The page boundary.
+
+    Raises:
+        InvalidCursorException: If the token is malformed or its signature does not match.
+    """
+    try:
+        payload_part, signature_part = token.split(".", 1)
+        payload = _b64decode(payload_part)
+        if not hmac.compare_digest(_sign(payload), _b64decode(signature_part)):
+            raise InvalidCursorException()
+        cursor = PageCursor(*json_util.loads(payload))
+    except InvalidCursorException:
+        raise
+    except Exception:
+        raise InvalidCursorException()
+    if cursor.order not in (1, -1) or cursor.direction not in ("next", "prev"):
+        raise InvalidCursorException()
+    return cursor
@@ -0,0 +1,82 @@
+from typing import Any
+from app.database.redis import RedisManager
+
+class FacetCounter:
+    """
+    Materialized value counts of a document field, kept in one Redis hash per field.
+
+    Document hooks apply increments as documents are written, so reading the
+    counts costs O(number of distinct values) instead of a collection scan.
+    Writes that bypass the hooks are repaired by `rebuild`.
+    """
+    prefix: str = "facets"
+
+    @classmethod
+    def _key(cls, collection: str, field: str) -> str:
+        return f"{cls.prefix}:{collection}:{field}"
+
+    @staticmethod
+    def _member(value: Any) -> str:
+        return "" if value is None else str(value)
+
+    @classmethod
+    async def apply(cls, collection: str, changes: dict[str, dict[Any, int]]) -> None:
+        """
+        Apply count deltas in a single round trip.
+
+        Args:
+            collection (str): The collection name.
+            changes (dict[str, dict[Any, int]]): Per field, the delta of each value.
+        """
+        increments = [
+            (cls._key(collection, field), cls._member(value), delta)
+            for field, deltas in changes.items()
+            for value, delta in deltas.items()
+            if delta
+        ]
+        if not increments:
+            return
+        client = await RedisManager.get_client()
+        async with client.pipeline(transaction=False) as pipe:
+            for key, member, delta in increments:
+                pipe.hincrby(key, member, delta)
+            await pipe.execute()
+
+    @classmethod
+    async def counts(cls, collection: str, field: str) -> dict[str, int]:
+        """
+        Return the number of documents per value of `field`, largest first.
+
+        Args:
+            collection (str): The collection name.
+            field (str): The faceted field.
+
+        Returns:
+            dict[str, int]: Counts by value; values with no documents are omitted.
+        """
+        client = await RedisManager.get_client()
+        raw = await client.hgetall(cls._key(collection, field))
+        counts = {member: int(count) for member, count in raw.items() if int(count) > 0}
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+    @classmethod
+    async def rebuild(cls, collection: str, field: str, counts: dict[Any, int]) -> None:
+        """
+        Replace the counts of a field atomically with freshly computed ones.
+
+        Args:
+            collection (str): The collection name.
+            field (str): The faceted field.
+            counts (dict[Any, int]): The exact count of every value.
+        """
+        key = cls._key(collection, field)
+        client = await RedisManager.get_client()
+        if not counts:
+            await client.delete(key)
+            return
+        staging = f"{key}:rebuild"
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.delete(staging)
+            pipe.hset(staging, mapping={cls._member(value): count for value, count in counts.items()})
+            pipe.rename(staging, key)
+            await pipe.execute()
@@ -0,0 +1,104 @@
+import asyncio
+from typing import Any, Callable, Generic, TypeVar
+from beanie import Document
+
+D = TypeVar("D", bound=Document)
+
+class BatchLoader(Generic[D]):
+    """
+    Coalesces concurrent single-document lookups into one `$in` query.
+
+    Keys requested within the same event-loop tick (or within `window` seconds)
+    are de-duplicated and fetched together; every caller receives its own copy
+    of the resulting document, or `None` if it does not exist. `on_query`, when
+    given, is called with the filter of every query actually sent.
+    """
+
+    def __init__(
+        self,
+        document: type[D],
+        field: str,
+        window: float = 0.0,
+        max_batch: int = 500,
+        on_query: Callable[[dict[str, Any]], Any] | None = None
+    ) -> None:
+        self.document = document
+        self.on_query = on_query
+        self.field = field
+        self.attribute = "id" if field == "_id" else field
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: dict[Any, list[asyncio.Future]] = {}
+        self._scheduled = False
+        self._tasks: set[asyncio.Task] = set()
+        self.batches = 0
+        self.keys_requested = 0
+        self.keys_fetched = 0
+
+    async def load(self, key: Any) -> D | None:
+        """
+        Return the document whose `field` equals `key`.
+
+        Args:
+            key (Any): The value to look up.
+
+        Returns:
+            D | None: The matching document, or `None`.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(key, []).append(future)
+        self.keys_requested += 1
+
+        if not self._scheduled:
+            self._scheduled = True
+            if self.window:
+                loop.call_later(self.window, self._dispatch)
+            else:
+                loop.call_soon(self._dispatch)
+        return await future
+
+    def _dispatch(self) -> None:
+        pending, self._pending = self._pending, {}
+        self._scheduled = False
+        keys = list(pending)
+        for start in range(0, len(keys), self.max_batch):
+            batch = {key: pending[key] for key in keys[start:start + self.max_batch]}
+            task = asyncio.create_task(self._fetch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, batch: dict[Any, list[asyncio.Future]]) -> None:
+        self.batches += 1
+        self.keys_fetched += len(batch)
+        query = {self.field: {"$in": list(batch)}}
+        if self.on_query:
+            self.on_query(query)
+        try:
+            documents = await self.document.find(query).to_list()
+        except Exception as e:
+            for waiters in batch.values():
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+            return
+
+        found = {getattr(document, self.attribute): document for document in documents}
+        for key, waiters in batch.items():
+            document = found.get(key)
+            for index, waiter in enumerate(waiters):
+                if waiter.done():
+                    continue
+                if document is None or index == 0:
+                    waiter.set_result(document)
+                else:
+                    waiter.set_result(document.model_copy(deep=True))
+
+    def stats(self) -> dict[str, Any]:
+        """Return batching counters."""
+        return {
+            "batches": self.batches,
+            "keys_requested": self.keys_requested,
+            "keys_fetched": self.keys_fetched,
+            "avg_batch_size": self.keys_fetched / self.batches if self.batches else 0.0,
+        }
@@ -1,19 +1,86 @@
-from beanie import Document, before_event, Save, Update, Insert
-from pydantic import Field
-from typing import Any, AsyncIterator
-from .criteria import Criteria
+import asyncio
+from beanie import Document, before_event, after_event, Save, Update, Insert, Replace, SaveChanges, Delete
+from collections import Counter
+from pydantic import Field, PrivateAttr
+from pymongo.errors import BulkWriteError, OperationFailure
+from typing import Any, AsyncIterator, ClassVar
+from .cache import LocalCache, MISSING
+from .criteria import Criteria, QueryShape
+from .loader import BatchLoader
+from .query_cache import QueryCache
+from .facets import FacetCounter
+from .sharding import ShardTargeting
+from app.conf.settings import settings
+from app.database.read_options import current_read_options
+from app.exceptions.query import UncoveredQueryException
 from datetime import datetime
 
+_loaders: dict[tuple[type, str], BatchLoader] = {}
+_indexes: LocalCache = LocalCache(max_entries=64)
+
 class CommonDocument(Document):
     """
         Base document class that adds automatic timestamping for creation and updates.
 
         Provides `created_at` and `updated_at` fields that are automatically managed
-        whenever a document is saved, inserted, or updated.
+        whenever a document is saved, inserted, or updated, and keeps the query
+        cache coherent by bumping the document's cache tags on every write.
+        Invalidation is opt-in: only models that declare `cache_tag_fields`
+        are cached, so only their writes pay for it.
+        Fields listed in `facet_fields` get materialized value counts, kept up to
+        date by the same write hooks.
+
+        `shard_key` declares how the collection is sharded (applied by the
+        `shard_collections` command); the query helpers below report whether
+        each query can be routed to a single shard.
     """
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime | None = Field(default=None)
+
+    cache_tag_fields: ClassVar[tuple[str, ...]] = ()
+    facet_fields: ClassVar[tuple[str, ...]] = ()
+    shard_key: ClassVar[tuple[tuple[str, int | str], ...]] = ()
+    _facet_previous: dict[str, Any] | None = PrivateAttr(default=None)
+
+    @classmethod
+    def get_pymongo_collection(cls):
+        """
+            Return the collection, configured with the read options of the current context.
+
+            Beanie and the helpers below issue every query through this method, so
+            a route (`read_from`) or a block (`reading`) that declares a read
+            preference or read concern applies it to all of its reads.
+        """
+        collection = super().get_pymongo_collection()
+        options = current_read_options()
+        if options is None:
+            return collection
+        return collection.with_options(**options.collection_options())
     
+    @classmethod
+    def shard_fields(cls) -> tuple[str, ...]:
+        """
+            Return the fields of the declared shard key, empty for unsharded collections.
+        """
+        return tuple(field for field, _ in cls.shard_key)
+
+    @classmethod
+    def record_targeting(cls, operation: str, match: dict[str, Any]) -> bool:
+        """
+            Record whether a query includes the shard key, logging untargeted shapes.
+
+            Args:
+                operation (str): The helper issuing the query, e.g. "paginate".
+                match (dict[str, Any]): The query filter.
+
+            Returns:
+                bool: Whether the query reaches only the shards owning its documents;
+                always True for unsharded collections.
+        """
+        if not cls.shard_key:
+            return True
+        return ShardTargeting.record(cls.get_collection_name(), operation, cls.shard_fields(), match)
+
     @before_event(Save, Update, Insert)
     async def set_update_date(self):
         """
@@ -22,34 +89,581 @@ class CommonDocument(Document):
             This ensures that the `updated_at` field always reflects the latest modification time.
         """
         self.updated_at = datetime.now()
+
+    @classmethod
+    def collection_tag(cls) -> str:
+        """
+            Return the cache tag shared by every query over this collection.
+        """
+        return cls.get_collection_name()
+
+    @classmethod
+    def field_tag(cls, field: str, value: Any) -> str:
+        """
+            Return the cache tag for documents whose `field` equals `value`.
+        """
+        return f"{cls.get_collection_name()}:{field}:{value}"
+
+    def cache_tags(self) -> list[str]:
+        """
+            Return every cache tag this document's current state contributes to.
+        """
+        tags = [self.collection_tag(), self.field_tag("_id", self.id)]
+        tags.extend(self.field_tag(field, getattr(self, field)) for field in self.cache_tag_fields)
+        return tags
+
+    @classmethod
+    def query_cached(cls) -> bool:
+        """
+            Return whether the model's queries go through the query cache.
+        """
+        return bool(cls.cache_tag_fields)
+
+    @before_event(Update, Save, Replace, SaveChanges, Delete)
+    async def invalidate_previous_cache_tags(self):
+        """
+            Bump the cache tags of the state being replaced.
+
+            Runs before the write so entries keyed by a value that is about to change
+            (e.g. an old ticker) are invalidated too.
+        """
+        if self.query_cached():
+            await QueryCache.invalidate(self.cache_tags())
+
+    @after_event(Insert, Update, Save, Replace, SaveChanges, Delete)
+    async def invalidate_cache_tags(self):
+        """
+            Bump the cache tags of the written state once the write has completed.
+        """
+        if self.query_cached():
+            await QueryCache.invalidate(self.cache_tags())
+
+    @classmethod
+    async def bulk_insert(cls, documents: list["CommonDocument"]) -> list[str | None]:
+        """
+            Insert documents in one unordered `insert_many`, reporting each one's outcome.
+
+            Unique indexes reject duplicates without stopping the rest of the batch.
+            Event hooks do not run for bulk inserts, so the timestamps, cache tags
+            and facet counts of the inserted documents are set here.
+
+            Args:
+                documents (list[CommonDocument]): The documents to insert.
+
+            Returns:
+                list[str | None]: Per document, `None` when inserted, "duplicate" when a
+                unique index rejected it, or the server's error message.
+        """
+        if not documents:
+            return []
+        now = datetime.now()
+        for document in documents:
+            document.created_at = now
+            document.updated_at = now
+        errors: dict[int, str] = {}
+        try:
+            await cls.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                errors[error["index"]] = "duplicate" if error.get("code") == 11000 else error.get("errmsg", "error")
+
+        inserted = [document for index, document in enumerate(documents) if index not in errors]
+        if inserted and cls.query_cached():
+            tags = {cls.collection_tag()}
+            for document in inserted:
+                tags.update(cls.field_tag(field, getattr(document, field)) for field in cls.cache_tag_fields)
+            await QueryCache.invalidate(sorted(tags))
+        if inserted:
+            await cls.count_facets(inserted, 1)
+        return [errors.get(index) for index in range(len(documents))]
+
+    def facet_values(self) -> dict[str, Any]:
+        """
+            Return the current value of every faceted field.
+        """
+        return {field: getattr(self, field) for field in self.facet_fields}
+
+    @classmethod
+    async def count_facets(cls, documents: list["CommonDocument"], delta: int) -> None:
+        """
+            Add `delta` to the facet counts of each document's values.
+
+            Args:
+                documents (list[CommonDocument]): The documents written.
+                delta (int): 1 for inserted documents, -1 for deleted ones.
+        """
+        if not cls.facet_fields:
+            return
+        changes: dict[str, Counter] = {field: Counter() for field in cls.facet_fields}
+        for document in documents:
+            for field, value in document.facet_values().items():
+                changes[field][value] += delta
+        await FacetCounter.apply(cls.get_collection_name(), changes)
+
+    @classmethod
+    async def facet_counts(cls, field: str) -> dict[str, int]:
+        """
+            Return the number of documents per value of a faceted field.
+
+            Args:
+                field (str): A field listed in `facet_fields`.
+
+            Returns:
+                dict[str, int]: Counts by value, largest first.
+        """
+        return await FacetCounter.counts(cls.get_collection_name(), field)
+
+    @before_event(Update, Save, Replace, SaveChanges)
+    async def remember_facet_values(self):
+        """
+            Read the persisted facet values before a write, to count only what changes.
+
+            `save` runs through `update`, so both hooks fire; the values are
+            consumed by the first after-hook and the second finds nothing to apply.
+        """
+        if not self.facet_fields:
+            return
+        persisted = None
+        if self.id is not None:
+            persisted = await self.get_pymongo_collection().find_one(
+                {"_id": self.id}, {field: 1 for field in self.facet_fields}
+            )
+        self._facet_previous = {field: persisted.get(field) for field in self.facet_fields} if persisted else {}
+
+    @after_event(Insert)
+    async def count_inserted_facets(self):
+        """
+            Count the facet values of an inserted document.
+        """
+        await self.count_facets([self], 1)
+
+    @after_event(Update, Save, Replace, SaveChanges)
+    async def count_updated_facets(self):
+        """
+            Move the counts of facet values changed by the write.
+        """
+        previous, self._facet_previous = self._facet_previous, None
+        if previous is None:
+            return
+        changes: dict[str, Counter] = {field: Counter() for field in self.facet_fields}
+        for field, value in self.facet_values().items():
+            if field not in previous:
+                changes[field][value] += 1
+            elif previous[field] != value:
+                changes[field][previous[field]] -= 1
+                changes[field][value] += 1
+        await FacetCounter.apply(self.get_collection_name(), changes)
+
+    @after_event(Delete)
+    async def count_deleted_facets(self):
+        """
+            Uncount the facet values of a deleted document.
+        """
+        await self.count_facets([self], -1)
+
+    @classmethod
+    async def cached_load_one(cls, field: str, key: Any, ttl: int) -> Any:
+        """
+            Fetch a single document by `field` through the query cache.
+
+            The entry is tagged with `field_tag(field, key)`, so it is invalidated by
+            any write to a document holding that value. Misses go through `load_one`.
+
+            Args:
+                field (str): The document field to match; must be "_id" or listed in `cache_tag_fields`.
+                key (Any): The value to look up.
+                ttl (int): Entry lifetime in seconds; 0 bypasses the cache.
+
+            Returns:
+                The matching document, or None.
+        """
+        if not ttl:
+            return await cls.load_one(field, key)
+
+        async def load() -> dict[str, Any] | None:
+            document = await cls.load_one(field, key)
+            return document.model_dump() if document else None
+
+        raw = await QueryCache.get_or_set(
+            cls.get_collection_name(),
+            {"op": "one", "field": field, "key": key},
+            [cls.field_tag(field, key)],
+            load,
+            ttl
+        )
+        return cls.model_validate(raw) if raw else None
+
+    @classmethod
+    async def cached_load_fields(cls, field: str, key: Any, fields: list[str], ttl: int) -> dict[str, Any] | None:
+        """
+            Fetch only some fields of a single document by `field` through the query cache.
+
+            Args:
+                field (str): The document field to match; must be "_id" or listed in `cache_tag_fields`.
+                key (Any): The value to look up.
+                fields (list[str]): The fields to return.
+                ttl (int): Entry lifetime in seconds; 0 bypasses the cache.
+
+            Returns:
+                dict[str, Any] | None: The projected document, or None.
+        """
+        projection = {name: 1 for name in sorted(set(fields))}
+        if "_id" not in projection:
+            projection["_id"] = 0
+
+        async def load() -> dict[str, Any] | None:
+            cls.record_targeting("load_fields", {field: key})
+            return await cls.get_pymongo_collection().find_one({field: key}, projection)
+
+        if not ttl:
+            return await load()
+        return await QueryCache.get_or_set(
+            cls.get_collection_name(),
+            {"op": "one", "field": field, "key": key, "fields": list(projection)},
+            [cls.field_tag(field, key)],
+            load,
+            ttl
+        )
+
+    @classmethod
+    async def load_one(cls, field: str, key: Any) -> Any:
+        """
+            Fetch a single document by `field`, batched with concurrent lookups.
+
+            Concurrent calls for the same model and field are coalesced into one
+            `$in` query (see `BatchLoader`), so a burst of requests costs one round trip.
+            Loading by the shard key keeps that query on the shards owning the keys.
+
+            Args:
+                field (str): The document field to match, e.g. "_id" or "ticker".
+                key (Any): The value to look up.
+
+            Returns:
+                The matching document, or None.
+        """
+        loader = _loaders.get((cls, field))
+        if loader is None:
+            loader = BatchLoader(
+                cls,
+                field,
+                window=settings.loader_batch_window_ms / 1000,
+                max_batch=settings.loader_max_batch,
+                on_query=lambda query: cls.record_targeting("load_one", query)
+            )
+            _loaders[(cls, field)] = loader
+        return await loader.load(key)
+
+    @classmethod
+    def loader_stats(cls) -> dict[str, Any]:
+        """
+            Return batching statistics for every active loader.
+        """
+        return {f"{model.__name__}.{field}": loader.stats() for (model, field), loader in _loaders.items()}
         
+    @classmethod
+    async def index_information(cls, refresh: bool = False) -> dict[str, dict[str, Any]]:
+        """
+            Return the collection's index specs, cached per process for `INDEX_CACHE_TTL` seconds.
+
+            The expiry picks up indexes created or dropped by another process (e.g.
+            the `sync_indexes` command) without restarting the workers.
+
+            Args:
+                refresh (bool): Reload the index list from the database.
+        """
+        indexes = MISSING if refresh else _indexes.get(cls)
+        if indexes is MISSING:
+            indexes = await cls.get_pymongo_collection().index_information()
+            _indexes.set(cls, indexes, settings.index_cache_ttl)
+        return indexes
+
+    @classmethod
+    def forget_indexes(cls) -> None:
+        """
+            Drop the cached index list, so the next query plan reloads it.
+        """
+        _indexes.delete(cls)
+
+    @classmethod
+    async def index_keys(cls, refresh: bool = False) -> dict[str, list[str]]:
+        """
+            Return the collection's indexes as `{name: [key fields]}`.
+
+            Only ascending/descending indexes are listed: hashed and text indexes
+            (e.g. a hashed shard key) cannot serve sorts or ranges.
+
+            Args:
+                refresh (bool): Reload the index list from the database.
+        """
+        return {
+            name: [field for field, _ in spec["key"]]
+            for name, spec in (await cls.index_information(refresh)).items()
+            if all(isinstance(direction, (int, float)) for _, direction in spec["key"])
+        }
+
+    @classmethod
+    async def unique_fields(cls) -> set[str]:
+        """
+            Return the fields that carry a single-field unique index, plus `_id`.
+        """
+        return {"_id"} | {
+            spec["key"][0][0]
+            for spec in (await cls.index_information()).values()
+            if spec.get("unique") and len(spec["key"]) == 1
+        }
+
+    @classmethod
+    async def resolve_sort(cls, criteria: Criteria) -> Criteria:
+        """
+            Drop the `_id` sort tie-breaker when the sort field is already unique.
+
+            Args:
+                criteria (Criteria): The criteria to adjust.
+
+            Returns:
+                Criteria: The criteria with a total, index-friendly sort.
+        """
+        if not criteria.sort_by:
+            return criteria
+        tiebreak = criteria.sort_by.field not in await cls.unique_fields()
+        if tiebreak == criteria.sort_by.tiebreak:
+            return criteria
+        return criteria.model_copy(update={"sort_by": criteria.sort_by.model_copy(update={"tiebreak": tiebreak})})
+
+    @staticmethod
+    def _supports(keys: list[str], shape: QueryShape) -> bool:
+        equality = len(shape.equality)
+        if set(keys[:equality]) != shape.equality:
+            return False
+        if shape.sort:
+            return tuple(keys[equality:equality + len(shape.sort)]) == shape.sort
+        return bool(equality) or (len(keys) > 0 and keys[0] in shape.range)
+
+    @classmethod
+    async def plan(cls, criteria: Criteria) -> tuple[list[dict[str, Any]], str | None]:
+        """
+            Compile the criteria and choose the index that serves it.
+
+            An index qualifies when its keys start with the query's equality fields
+            followed by its sort field, so the page is read in order from the index.
+            Among those, one that also holds every filtered and projected field is
+            preferred, so the query is covered and no document is fetched.
+            Shapes no index supports are logged, or rejected when
+            `UNCOVERED_QUERY_POLICY` is "reject".
+
+            Args:
+                criteria (Criteria): The filtering, sorting, and pagination configuration.
+
+            Returns:
+                tuple[list[dict[str, Any]], str | None]: The pipeline and the index
+                name to hint, or `None` for unfiltered, unsorted queries and
+                unsupported shapes.
+
+            Raises:
+                UncoveredQueryException: If no index supports the shape and the policy is "reject".
+        """
+        pipeline = criteria.to_pipeline()
+        shape = criteria.shape()
+        if not (shape.equality or shape.sort or shape.range):
+            return pipeline, None
+
+        supporting = [
+            (name, keys)
+            for name, keys in (await cls.index_keys()).items()
+            if cls._supports(keys, shape)
+        ]
+        projection = criteria.projection()
+        if projection:
+            needed = {field for field, included in projection.items() if included}
+            needed |= shape.equality | shape.range | set(shape.sort)
+            for name, keys in supporting:
+                if needed <= set(keys):
+                    return pipeline, name
+        if supporting:
+            return pipeline, supporting[0][0]
+
+        description = (
+            f"{cls.get_collection_name()}: equality={sorted(shape.equality)} "
+            f"sort={list(shape.sort)} range={sorted(shape.range)}"
+        )
+        if settings.uncovered_query_policy == "reject":
+            raise UncoveredQueryException(description)
+        print(f"No index supports query shape {description}")
+        return pipeline, None
+
+    @staticmethod
+    def _stale_hint(error: OperationFailure, hint: str | None) -> bool:
+        # The server rejects a hint naming an index that no longer exists.
+        return bool(hint) and error.code == 2 and "hint" in str(error).lower()
+
+    @classmethod
+    async def replan(cls, criteria: Criteria) -> str | None:
+        """
+            Reload the index list and choose the index for the criteria again.
+
+            Used when a query fails because its hinted index was dropped after
+            the index list was cached.
+
+            Args:
+                criteria (Criteria): The criteria that was planned with the stale list.
+
+            Returns:
+                str | None: The index name to hint now.
+        """
+        print(f"Hinted index missing on {cls.get_collection_name()}; reloading the index list")
+        cls.forget_indexes()
+        _, hint = await cls.plan(criteria)
+        return hint
+
+    @classmethod
+    async def stream(cls, criteria: Criteria, batch_size: int, hint: str | None = None) -> AsyncIterator[dict[str, Any]]:
+        """
+            Iterate every document matched by the criteria through one server-side cursor.
+
+            Filters, date window, sort and requested fields are honored; cursor and
+            limit are ignored. Documents are fetched `batch_size` at a time, so
+            memory stays flat however many documents match.
+
+            The criteria and hint come from `resolve_sort` and `plan`, run by the
+            caller before it starts a streaming response: errors raised while
+            planning (e.g. `UncoveredQueryException`) then still become an error
+            status instead of a truncated download.
+
+            Args:
+                criteria (Criteria): The filtering, sorting, and projection configuration.
+                batch_size (int): Documents per round trip to the server.
+                hint (str | None): The index chosen by `plan`.
+
+            Yields:
+                dict[str, Any]: Each raw document, restricted to `criteria.fields` when set.
+        """
+        projection = None
+        if criteria.fields:
+            projection = {field: 1 for field in criteria.fields}
+            projection.setdefault("_id", 0)
+
+        match = criteria.count_match()
+        cls.record_targeting("stream", match)
+        replanned = False
+        while True:
+            cursor = cls.get_pymongo_collection().find(match, projection, batch_size=batch_size)
+            if criteria.sort_by:
+                cursor = cursor.sort(list(criteria.sort_by.model_dump().items()))
+            if hint:
+                cursor = cursor.hint(hint)
+            started = False
+            try:
+                async with cursor:
+                    async for document in cursor:
+                        started = True
+                        yield document
+                return
+            except OperationFailure as e:
+                # A bad hint fails the first batch, before anything was sent.
+                if started or replanned or not cls._stale_hint(e, hint):
+                    raise
+                hint, replanned = await cls.replan(criteria), True
+
+    @classmethod
+    async def count_matching(cls, criteria: Criteria) -> int:
+        """
+            Count the documents matched by the criteria's filters and date window.
+
+            Without filters the collection metadata count is used, which needs no
+            scan (and no scatter-gather on a sharded collection). Filtered counts
+            are cached, tagged with the collection, for `PAGINATE_TOTAL_CACHE_TTL`
+            seconds; writes that bypass the event hooks are therefore reflected
+            within that bound.
+
+            Args:
+                criteria (Criteria): The criteria whose result set is counted.
+
+            Returns:
+                int: The number of matching documents, ignoring cursor and limit.
+        """
+        collection = cls.get_pymongo_collection()
+        match = criteria.count_match()
+        if not match:
+            return await collection.estimated_document_count()
+
+        async def count() -> int:
+            cls.record_targeting("count", match)
+            return await collection.count_documents(match)
+
+        if not settings.paginate_total_cache_ttl:
+            return await count()
+        return await QueryCache.get_or_set(
+            cls.get_collection_name(),
+            {"op": "count", "match": match},
+            [cls.collection_tag()],
+            count,
+            settings.paginate_total_cache_ttl
+        )
+
     @classmethod
     async def paginate(
         cls,
         criteria: Criteria,
-        cursor_name: str
+        cache_ttl: int = 0,
+        with_total: bool = True
     ) -> dict[str, Any]:
         """
             Apply the criteria pattern using MongoDB aggregation.
+
+            Pages are selected by keyset on the sort field (and `_id` when the
+            field is not unique), so reading any page costs the same regardless
+            of its depth.
             
             Args:
                 criteria (Criteria): The filtering, sorting, and pagination configuration.
+                cache_ttl (int): Cache the page for this many seconds, tagged with the
+                    collection so any write invalidates it. 0 disables caching.
+                with_total (bool): Whether to count the matching documents; when False
+                    `total` is `None` and no count query runs.
 
             Returns:
-                dict[str, Any]: Contains paginated results, total count, and next cursor.
+                dict[str, Any]: Contains paginated results, total count, and the next
+                and previous cursors.
+
+            Raises:
+                InvalidCursorException: If the cursor is forged or belongs to another sort.
         """
-        pipeline = criteria.to_pipeline()
-        cursor = cls.aggregate(pipeline)
+        criteria = await cls.resolve_sort(criteria)
+        if cache_ttl:
+            return await QueryCache.get_or_set(
+                cls.get_collection_name(),
+                {"op": "paginate", "criteria": criteria.cache_key(), "with_total": with_total},
+                [cls.collection_tag()],
+                lambda: cls.paginate(criteria, with_total=with_total),
+                cache_ttl
+            )
+
+        pipeline, hint = await cls.plan(criteria)
+
+        async def page() -> list[dict[str, Any]]:
+            cls.record_targeting("paginate", criteria.page_match())
+            try:
+                return await run(hint)
+            except OperationFailure as e:
+                if not cls._stale_hint(e, hint):
+                    raise
+                return await run(await cls.replan(criteria))
 
-        total = await cls.count()
+        async def run(index: str | None) -> list[dict[str, Any]]:
+            options = {"hint": index} if index else {}
+            return [doc async for doc in cls.aggregate(pipeline, **options)]
 
-        docs = [doc async for doc in cursor]
-        next_cursor = str(docs[-1][cursor_name]) if docs else None
+        if with_total:
+            docs, total = await asyncio.gather(page(), cls.count_matching(criteria))
+        else:
+            docs, total = await page(), None
+        docs, next_cursor, prev_cursor = criteria.page_documents(docs)
 
         return {
             "result": docs,
             "total": total,
-            "next_cursor": next_cursor
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor
         }
 
     
\ No newline at end of file
@@ -0,0 +1,367 @@
+import asyncio
+import hashlib
+import json
+import math
+import random
+import struct
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Literal, NamedTuple
+from bson import json_util
+from app.conf.settings import settings
+from app.database.redis import RedisManager
+from app.database.pubsub import PubSubManager
+from app.database.read_options import current_read_options, reading
+from .cache import LocalCache, MISSING
+from . import codecs
+
+Codec = Literal["value", "raw"]
+_META = struct.Struct(">dd")
+
+class _Load(NamedTuple):
+    """How to (re)compute and store one cache entry."""
+    loader: Callable[[], Awaitable[Any]]
+    ttl: int
+    stale_ttl: int
+    codec: Codec
+
+class QueryCache:
+    """
+    Two-tier cache for query results with tag-based invalidation.
+
+    Every entry is stored under a key derived from the query and the current
+    version of each of its tags (e.g. a collection, a document id, a ticker).
+    Writes bump tag versions, which makes every dependent entry unreachable at
+    once; orphaned entries simply age out through their TTL.
+
+    Redis (L2) is shared by all workers. Each worker keeps an in-process L1 of
+    entries and of tag versions; versioned entries never change, so only the
+    tag versions need invalidating, which is broadcast over pub/sub.
+
+    Misses are single-flight: concurrent callers in a worker share one load, and
+    a short Redis lock lets one worker compute while the others wait for its result.
+
+    Entries have a soft and a hard expiry. Past the soft expiry the stale value
+    is still served while a background task refreshes it, and refreshes start
+    early with a probability that grows as expiry nears (XFetch), weighted by how
+    long the value took to compute.
+
+    An entry is a fixed binary header (soft expiry and compute time) followed by
+    the value encoded by `codecs`: with the "value" codec structured values use
+    the configured serializer (BSON by default, msgpack if installed); with "raw"
+    the loader's string is stored as bytes and returned as bytes, e.g. a
+    pre-rendered document. Larger payloads are compressed. The encoding
+    only applies to Redis: L1 keeps the decoded header and value, so an L1 hit
+    costs no decoding.
+
+    Loaders always read from the primary, even in a request routed to
+    secondaries (`read_from`): a lagging secondary would otherwise have its
+    stale result served for the whole TTL. Only the fills pay for it; hits
+    never reach the database.
+    """
+    prefix: str = "qc"
+    channel: str = "qc:invalidate"
+    _entries: LocalCache = LocalCache(
+        max_entries=settings.query_cache_l1_max_entries,
+        max_bytes=settings.query_cache_l1_max_bytes
+    )
+    _tags: LocalCache = LocalCache(max_entries=settings.query_cache_l1_max_entries)
+    _generation: int = 0
+    _inflight: dict[str, asyncio.Future] = {}
+    _refreshing: set[asyncio.Task] = set()
+    _stats: dict[str, int] = {
+        "l1_hits": 0,
+        "l2_hits": 0,
+        "misses": 0,
+        "stale_hits": 0,
+        "early_refreshes": 0,
+        "coalesced": 0,
+        "lock_waits": 0,
+        "lock_timeouts": 0,
+        "invalidations": 0,
+    }
+    _serializer, _compression = codecs.resolve(settings.query_cache_serializer, settings.query_cache_compression)
+    _release_lock_script: str = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+    )
+
+    @classmethod
+    def _tag_key(cls, tag: str) -> str:
+        return f"{cls.prefix}:tag:{tag}"
+
+    @classmethod
+    async def _tag_versions(cls, tags: list[str]) -> list[str]:
+        versions: dict[str, str] = {}
+        missing = []
+        for tag in tags:
+            version = cls._tags.get(tag)
+            if version is MISSING:
+                missing.append(tag)
+            else:
+                versions[tag] = version
+
+        if missing:
+            # An invalidation arriving while MGET is in flight makes the result
+            # possibly stale, so it is used for this lookup but not kept in L1.
+            generation = cls._generation
+            client = await RedisManager.get_client()
+            values = await client.mget([cls._tag_key(tag) for tag in missing])
+            for tag, value in zip(missing, values):
+                versions[tag] = value or "0"
+                if generation == cls._generation:
+                    cls._tags.set(tag, versions[tag], settings.query_cache_l1_ttl)
+        return [versions[tag] for tag in tags]
+
+    @classmethod
+    async def _entry_key(cls, namespace: str, key_parts: Any, tags: list[str]) -> str:
+        versions = await cls._tag_versions(tags)
+        fingerprint = json_util.dumps([key_parts, tags, versions], sort_keys=True)
+        return f"{cls.prefix}:{namespace}:{hashlib.sha1(fingerprint.encode()).hexdigest()}"
+
+    @classmethod
+    def _encode(cls, value: Any, header: dict[str, Any], load: _Load) -> bytes:
+        serializer = "raw" if load.codec == "raw" else cls._serializer
+        payload = codecs.encode(value, serializer, cls._compression, settings.query_cache_compress_min_bytes)
+        return _META.pack(header["soft_expires_at"], header["delta"]) + payload
+
+    @staticmethod
+    def _decode(stored: bytes) -> tuple[dict[str, Any], Any] | None:
+        # Entries in a format this worker cannot read (e.g. written by a newer
+        # release or with an uninstalled codec) are treated as misses.
+        try:
+            soft_expires_at, delta = _META.unpack_from(stored)
+            value = codecs.decode(stored[_META.size:])
+        except (codecs.UnsupportedCacheFormat, struct.error):
+            return None
+        return {"soft_expires_at": soft_expires_at, "delta": delta}, value
+
+    @classmethod
+    def _remember(cls, key: str, header: dict[str, Any], value: Any, size: int, load: _Load) -> None:
+        # The encoded size stands in for the in-memory size of the decoded value.
+        ttl = min(load.ttl + load.stale_ttl, settings.query_cache_l1_ttl)
+        cls._entries.set(key, (header, value), ttl, size=size)
+
+    @classmethod
+    async def get_or_set(
+        cls,
+        namespace: str,
+        key_parts: Any,
+        tags: list[str],
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int,
+        stale_ttl: int | None = None,
+        codec: Codec = "value"
+    ) -> Any:
+        """
+        Return the cached value for a query, computing and storing it on a miss.
+
+        Args:
+            namespace (str): Key namespace, usually the collection name.
+            key_parts (Any): BSON-serializable description of the query.
+            tags (list[str]): Tags whose version changes invalidate the entry.
+            loader (Callable): Coroutine function producing the value on a miss.
+            ttl (int): Seconds the entry is fresh (soft TTL).
+            stale_ttl (int | None): Extra seconds the entry may be served stale while
+                it is refreshed; defaults to `QUERY_CACHE_STALE_TTL`.
+            codec (Codec): "value" for structured values, "raw" for a string or
+                bytes payload that is returned as bytes.
+
+        Returns:
+            Any: The cached or freshly loaded value.
+        """
+        load = _Load(
+            loader,
+            ttl,
+            settings.query_cache_stale_ttl if stale_ttl is None else stale_ttl,
+            codec
+        )
+        key = await cls._entry_key(namespace, key_parts, tags)
+        decoded = cls._entries.get(key)
+        if decoded is not MISSING:
+            cls._stats["l1_hits"] += 1
+        else:
+            client = await RedisManager.get_binary_client()
+            stored = await client.get(key)
+            decoded = cls._decode(stored) if stored is not None else None
+            if decoded is None:
+                cls._stats["misses"] += 1
+                return await cls._single_flight(key, load)
+            cls._stats["l2_hits"] += 1
+            cls._remember(key, *decoded, len(stored), load)
+
+        header, value = decoded
+        cls._maybe_refresh(key, header, load)
+        return value
+
+    @classmethod
+    def _maybe_refresh(cls, key: str, header: dict[str, Any], load: _Load) -> None:
+        now = time.time()
+        if now >= header["soft_expires_at"]:
+            cls._stats["stale_hits"] += 1
+        else:
+            beta = settings.query_cache_early_refresh_beta
+            early_by = -header["delta"] * beta * math.log(1 - random.random())
+            if now + early_by < header["soft_expires_at"]:
+                return
+            cls._stats["early_refreshes"] += 1
+
+        if key in cls._inflight:
+            return
+        task = asyncio.create_task(cls._refresh(key, load, header["soft_expires_at"]))
+        cls._refreshing.add(task)
+        task.add_done_callback(cls._refreshing.discard)
+
+    @classmethod
+    async def _refresh(cls, key: str, load: _Load, seen: float) -> None:
+        try:
+            await cls._single_flight(key, load, seen)
+        except Exception as e:
+            print(f"Background refresh of {key} failed: {e}")
+
+    @classmethod
+    async def _compute(cls, key: str, load: _Load) -> Any:
+        started = time.perf_counter()
+        options = current_read_options()
+        if options is not None and options.preference != "primary":
+            with reading("primary", options.concern):
+                value = await load.loader()
+        else:
+            value = await load.loader()
+        header = {"soft_expires_at": time.time() + load.ttl, "delta": time.perf_counter() - started}
+        stored = cls._encode(value, header, load)
+        client = await RedisManager.get_binary_client()
+        await client.set(key, stored, ex=load.ttl + load.stale_ttl)
+        if load.codec == "raw" and isinstance(value, str):
+            value = value.encode()
+        cls._remember(key, header, value, len(stored), load)
+        return value
+
+    @classmethod
+    async def _single_flight(cls, key: str, load: _Load, seen: float | None = None) -> Any:
+        inflight = cls._inflight.get(key)
+        if inflight:
+            cls._stats["coalesced"] += 1
+            try:
+                return await asyncio.wait_for(asyncio.shield(inflight), settings.query_cache_lock_timeout)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+            except Exception:
+                pass
+            # The leader failed or is too slow: load independently.
+            return await cls._compute(key, load)
+
+        future = asyncio.get_running_loop().create_future()
+        cls._inflight[key] = future
+        try:
+            value = await cls._load_with_lock(key, load, seen)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            cls._inflight.pop(key, None)
+
+    @classmethod
+    async def _load_with_lock(cls, key: str, load: _Load, seen: float | None = None) -> Any:
+        """
+        Compute the entry under a Redis lock, or wait for the worker holding it.
+
+        Args:
+            key (str): The entry key.
+            load (_Load): How to compute and store the entry.
+            seen (float | None): For a refresh, the soft expiry of the entry that
+                triggered it; only a newer stored entry skips the recompute. For a
+                miss, any entry that is still fresh does.
+        """
+        client = await RedisManager.get_client()
+        lock_key = f"{key}:lock"
+        token = uuid.uuid4().hex
+        if await client.set(lock_key, token, nx=True, px=int(settings.query_cache_lock_ttl * 1000)):
+            try:
+                # The previous lock holder may have stored a newer entry just
+                # before releasing the lock; use it rather than recompute. An
+                # early refresh starts from an entry that is still fresh, so it
+                # only counts as done once the stored entry has been replaced.
+                binary_client = await RedisManager.get_binary_client()
+                stored = await binary_client.get(key)
+                decoded = cls._decode(stored) if stored is not None else None
+                newer_than = time.time() if seen is None else seen
+                if decoded is not None and decoded[0]["soft_expires_at"] > newer_than:
+                    cls._remember(key, *decoded, len(stored), load)
+                    return decoded[1]
+                return await cls._compute(key, load)
+            finally:
+                await client.eval(cls._release_lock_script, 1, lock_key, token)
+
+        # Another worker holds the lock: wait for its result to land in Redis
+        # (during a background refresh the current stale entry is accepted).
+        cls._stats["lock_waits"] += 1
+        binary_client = await RedisManager.get_binary_client()
+        deadline = time.monotonic() + settings.query_cache_lock_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            stored = await binary_client.get(key)
+            decoded = cls._decode(stored) if stored is not None else None
+            if decoded is not None:
+                cls._remember(key, *decoded, len(stored), load)
+                return decoded[1]
+
+        cls._stats["lock_timeouts"] += 1
+        return await cls._compute(key, load)
+
+    @classmethod
+    async def invalidate(cls, tags: list[str]) -> None:
+        """
+        Bump the version of every tag, invalidating all entries that depend on them
+        on every worker.
+
+        Args:
+            tags (list[str]): The tags to bump.
+        """
+        client = await RedisManager.get_client()
+        async with client.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.incr(cls._tag_key(tag))
+            await pipe.execute()
+        cls._forget(tags)
+        await PubSubManager.publish(cls.channel, json.dumps(tags))
+        cls._stats["invalidations"] += 1
+
+    @classmethod
+    def _forget(cls, tags: list[str]) -> None:
+        cls._generation += 1
+        for tag in tags:
+            cls._tags.delete(tag)
+
+    @classmethod
+    def _on_invalidate(cls, message: str) -> None:
+        cls._forget(json.loads(message))
+
+    @classmethod
+    def _resync(cls) -> None:
+        cls._generation += 1
+        cls._tags.clear()
+
+    @classmethod
+    def stats(cls) -> dict[str, Any]:
+        """Return per-tier hit ratios and L1 size/eviction statistics."""
+        lookups = cls._stats["l1_hits"] + cls._stats["l2_hits"] + cls._stats["misses"]
+        l2_lookups = cls._stats["l2_hits"] + cls._stats["misses"]
+        return {
+            **cls._stats,
+            "l1_hit_ratio": cls._stats["l1_hits"] / lookups if lookups else 0.0,
+            "l2_hit_ratio": cls._stats["l2_hits"] / l2_lookups if l2_lookups else 0.0,
+            "l1_entries": cls._entries.stats(),
+            "l1_tags": cls._tags.stats(),
+            "serializer": cls._serializer,
+            "compression": cls._compression,
+        }
+
+
+PubSubManager.subscribe(QueryCache.channel, QueryCache._on_invalidate, resync=QueryCache._resync)
@@ -0,0 +1,77 @@
+from fastapi import Response, status
+from pydantic import BaseModel
+from typing import Any, Awaitable, Callable
+from .query_cache import QueryCache
+
+class ResponseCache:
+    """
+    Caches final responses in the query cache.
+
+    Each entry holds the status code, the headers and the serialized body, and
+    a hit rebuilds the `Response` from all three, skipping Pydantic parsing,
+    `response_model` validation and JSON serialization entirely.
+    """
+
+    @classmethod
+    async def get_or_build(
+        cls,
+        namespace: str,
+        key_parts: Any,
+        tags: list[str],
+        build: Callable[[], Awaitable[BaseModel | Response]],
+        ttl: int,
+        media_type: str = "application/json",
+        status_code: int = status.HTTP_200_OK,
+        headers: dict[str, str] | None = None
+    ) -> Response:
+        """
+        Return the cached response for a request, rendering it on a miss.
+
+        Args:
+            namespace (str): Key namespace, usually the collection name.
+            key_parts (Any): BSON-serializable description of the request.
+            tags (list[str]): Tags whose version changes invalidate the body.
+            build (Callable): Coroutine function returning the response model, which
+                must already be fully validated since hits bypass `response_model`,
+                or a complete `Response` whose status and headers are kept as well.
+            ttl (int): Seconds the response is fresh.
+            media_type (str): The response content type.
+            status_code (int): The status code sent with a response model.
+            headers (dict[str, str] | None): Extra headers sent with a response model.
+
+        Returns:
+            Response: The response rebuilt from the cached status, headers and body.
+        """
+        async def render() -> dict[str, Any]:
+            built = await build()
+            if isinstance(built, Response):
+                return {
+                    "status_code": built.status_code,
+                    # Content-Length is recomputed from the body on every hit.
+                    "headers": [
+                        [name.decode("latin-1"), value.decode("latin-1")]
+                        for name, value in built.raw_headers
+                        if name != b"content-length"
+                    ],
+                    "body": bytes(built.body),
+                }
+            return {
+                "status_code": status_code,
+                "headers": list((headers or {}).items()),
+                "body": built.model_dump_json().encode(),
+            }
+
+        cached = await QueryCache.get_or_set(
+            namespace,
+            {"response": key_parts, "media_type": media_type},
+            tags,
+            render,
+            ttl
+        )
+        response = Response(content=cached["body"], status_code=cached["status_code"], media_type=media_type)
+        for name, value in cached["headers"]:
+            if name.lower() == "content-type":
+                response.headers[name] = value
+            else:
+                response.headers.append(name, value)
+        return response
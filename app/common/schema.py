@@ -1,7 +1,8 @@
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, create_model
 from pydantic.alias_generators import to_camel
 from typing import TypeVar, Generic, Any
 from datetime import datetime
+from functools import lru_cache
 
 T = TypeVar('T')
 
@@ -16,14 +17,43 @@ class CommonBaseModel(BaseModel, Generic[T]):
             extra="forbid"
         )
 
+@lru_cache
+def model_subset(model: type[BaseModel], fields: tuple[str, ...]) -> type[BaseModel]:
+    """
+    Build (once) a model with only some fields of `model`, for sparse fieldsets.
+
+    Args:
+        model (type[BaseModel]): The full response model.
+        fields (tuple[str, ...]): The fields to keep, in a canonical order.
+
+    Returns:
+        type[BaseModel]: A model with the selected fields and their validation.
+    """
+    return create_model(
+        f"{model.__name__}Fields",
+        __base__=CommonBaseModel,
+        **{name: (info.annotation, info) for name, info in model.model_fields.items() if name in fields}
+    )
+
 class PaginationResponseDTO(CommonBaseModel, BaseModel):
     """
     DTO to hold pagination metadata for hybrid (time + cursor) pagination.
     """
     limit: int = Field(..., gt=0, description="Number of items requested per page")
-    total: int = Field(..., ge=0, description="Total number of items within the date range")
+    total: int | None = Field(
+        default=None, ge=0, description="Total number of items within the date range, if requested"
+    )
     next_cursor: Any | None = Field(
-        default=None, description="Cursor (ObjectId) for the next page, or None if no more pages"
+        default=None, description="Opaque cursor for the next page, or None if no more pages"
+    )
+    prev_cursor: str | None = Field(
+        default=None, description="Opaque cursor for the previous page, or None on the first page"
+    )
+    next_link: str | None = Field(
+        default=None, description="Relative URL of the next page"
+    )
+    prev_link: str | None = Field(
+        default=None, description="Relative URL of the previous page"
     )
     start_date: datetime | None = Field(
         default=None, description="Start of the time window used for filtering"
@@ -0,0 +1,75 @@
+from collections import Counter
+from typing import Any
+
+def targets(shard_fields: tuple[str, ...], match: dict[str, Any]) -> bool:
+    """
+    Tell whether mongos can route a query to the shards owning its documents.
+
+    A query is targeted when every shard key field is matched by equality
+    (a plain value, `$eq`, or `$in`), either at the top level or in one of
+    its `$and` conditions. Anything else is broadcast to every shard.
+
+    Args:
+        shard_fields (tuple[str, ...]): The fields of the collection's shard key.
+        match (dict[str, Any]): The query filter.
+
+    Returns:
+        bool: Whether the query is targeted.
+    """
+    conditions = [match, *match.get("$and", [])]
+    return all(any(_equality(condition, field) for condition in conditions) for field in shard_fields)
+
+def _equality(condition: dict[str, Any], field: str) -> bool:
+    if field not in condition:
+        return False
+    value = condition[field]
+    if isinstance(value, dict) and any(key.startswith("$") for key in value):
+        return "$eq" in value or "$in" in value
+    return True
+
+class ShardTargeting:
+    """
+    Counts targeted and broadcast (scatter-gather) queries per collection and operation.
+
+    Each untargeted query shape is logged once per process, so a listing that
+    is broadcast by design does not flood the logs; the counters show how often
+    it actually runs.
+    """
+    _counts: dict[str, Counter] = {}
+    _logged: set[tuple[str, str, tuple[str, ...]]] = set()
+
+    @classmethod
+    def record(cls, collection: str, operation: str, shard_fields: tuple[str, ...], match: dict[str, Any]) -> bool:
+        """
+        Count a query and log it the first time its shape is seen untargeted.
+
+        Args:
+            collection (str): The collection name.
+            operation (str): The helper issuing the query, e.g. "paginate".
+            shard_fields (tuple[str, ...]): The fields of the collection's shard key.
+            match (dict[str, Any]): The query filter.
+
+        Returns:
+            bool: Whether the query is targeted.
+        """
+        targeted = targets(shard_fields, match)
+        counts = cls._counts.setdefault(f"{collection}.{operation}", Counter())
+        counts["targeted" if targeted else "untargeted"] += 1
+        shape = (collection, operation, tuple(sorted(match)))
+        if not targeted and shape not in cls._logged:
+            cls._logged.add(shape)
+            print(
+                f"Untargeted query on sharded collection {collection} ({operation}): "
+                f"fields={list(shape[2])} lack shard key {list(shard_fields)}"
+            )
+        return targeted
+
+    @classmethod
+    def stats(cls) -> dict[str, Any]:
+        """
+        Return the targeted and untargeted query counts per collection and operation.
+        """
+        return {
+            name: {"targeted": counts["targeted"], "untargeted": counts["untargeted"]}
+            for name, counts in cls._counts.items()
+        }
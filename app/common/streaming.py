@@ -0,0 +1,148 @@
+import asyncio
+import codecs
+import json
+from tempfile import SpooledTemporaryFile
+from typing import IO, Any, AsyncIterator
+
+class RowError(ValueError):
+    """A single input row that could not be parsed; the rows around it are still usable."""
+
+class BodyTooLargeError(ValueError):
+    """The request body exceeds the configured limit."""
+
+async def spool(chunks: AsyncIterator[bytes], max_memory_bytes: int, max_bytes: int) -> IO[bytes]:
+    """
+    Read a whole byte stream into a temporary file, in memory until `max_memory_bytes`.
+
+    Reading the request body completely before a streaming response starts
+    matters: once the response is sent the server listens for disconnects on
+    the same channel, and body chunks arriving after that are lost.
+
+    Args:
+        chunks (AsyncIterator[bytes]): The request body stream.
+        max_memory_bytes (int): Size above which the body is moved to disk.
+        max_bytes (int): Maximum size of the whole body.
+
+    Returns:
+        IO[bytes]: The spooled body, rewound; the caller closes it.
+
+    Raises:
+        BodyTooLargeError: If the body is larger than `max_bytes`.
+    """
+    file = SpooledTemporaryFile(max_size=max_memory_bytes)
+    size = 0
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                raise BodyTooLargeError(f"Body exceeds {max_bytes} bytes")
+            file.write(chunk)
+    except BaseException:
+        file.close()
+        raise
+    file.seek(0)
+    return file
+
+async def iter_file(file: IO[bytes], chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    """
+    Read a file in chunks without blocking the event loop.
+
+    Args:
+        file (IO[bytes]): The file to read, positioned at its start.
+        chunk_size (int): Bytes per read.
+
+    Yields:
+        bytes: Each chunk, until the end of the file.
+    """
+    while chunk := await asyncio.to_thread(file.read, chunk_size):
+        yield chunk
+
+async def iter_ndjson(chunks: AsyncIterator[bytes], max_row_bytes: int) -> AsyncIterator[Any]:
+    """
+    Parse newline-delimited JSON from a byte stream, one row at a time.
+
+    Only the current row is buffered. A row that is not valid JSON, or longer
+    than `max_row_bytes`, is yielded as a `RowError` and skipped.
+
+    Args:
+        chunks (AsyncIterator[bytes]): The request body stream.
+        max_row_bytes (int): Maximum size of a single row.
+
+    Yields:
+        Any: Each parsed row, or a `RowError` in its place.
+    """
+    buffer = b""
+    skipping = False
+    async for chunk in chunks:
+        buffer += chunk
+        while True:
+            end = buffer.find(b"\n")
+            if end < 0:
+                break
+            line, buffer = buffer[:end], buffer[end + 1:]
+            if skipping:
+                skipping = False
+                continue
+            if line.strip():
+                yield _parse(line)
+        if not skipping and len(buffer) > max_row_bytes:
+            yield RowError(f"Row exceeds {max_row_bytes} bytes")
+            skipping = True
+        if skipping:
+            buffer = b""
+    if buffer.strip() and not skipping:
+        yield _parse(buffer)
+
+async def iter_json_array(chunks: AsyncIterator[bytes], max_row_bytes: int) -> AsyncIterator[Any]:
+    """
+    Parse the elements of a top-level JSON array from a byte stream, one at a time.
+
+    Only the current element is buffered. Unlike NDJSON, a malformed element
+    leaves no way to find the next one, so it ends the stream.
+
+    Args:
+        chunks (AsyncIterator[bytes]): The request body stream.
+        max_row_bytes (int): Maximum size of a single element.
+
+    Yields:
+        Any: Each parsed element.
+
+    Raises:
+        ValueError: If the body is not a JSON array or an element is malformed or too large.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    state = "start"
+    async for chunk in chunks:
+        buffer += text_decoder.decode(chunk)
+        while True:
+            buffer = buffer.lstrip()
+            if not buffer:
+                break
+            if state == "start":
+                if buffer[0] != "[":
+                    raise ValueError("Body is not a JSON array")
+                buffer, state = buffer[1:], "value_or_end"
+            elif state in ("separator", "value_or_end") and buffer[0] == "]":
+                return
+            elif state == "separator":
+                if buffer[0] != ",":
+                    raise ValueError("Expected ',' between array elements")
+                buffer, state = buffer[1:], "value"
+            else:
+                try:
+                    value, end = decoder.raw_decode(buffer)
+                except json.JSONDecodeError:
+                    if len(buffer) > max_row_bytes:
+                        raise ValueError(f"Element is malformed or exceeds {max_row_bytes} bytes")
+                    break
+                buffer, state = buffer[end:], "separator"
+                yield value
+    raise ValueError("Unexpected end of JSON array")
+
+def _parse(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return RowError(f"Invalid JSON: {e}")
@@ -0,0 +1,93 @@
+import asyncio
+import random
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable
+from bson import json_util
+from app.database.redis import RedisManager
+
+Warmer = Callable[..., Awaitable[Any]]
+
+class CacheWarmer:
+    """
+    Records which cached requests are popular and replays them at startup.
+
+    Request parameters are sampled into a Redis sorted set per request kind,
+    shared by all workers, so a freshly started worker can pre-populate its
+    caches with the most requested pages, in the background while it already
+    serves traffic.
+    """
+    prefix: str = "warmup"
+    _warmers: dict[str, Warmer] = {}
+    # Set only inside the warm-up task, so its replays are not recorded while
+    # concurrent live requests still are.
+    _warming: ContextVar[bool] = ContextVar("cache_warming", default=False)
+
+    @classmethod
+    def _key(cls, name: str) -> str:
+        return f"{cls.prefix}:{name}"
+
+    @classmethod
+    def register(cls, name: str, warmer: Warmer) -> None:
+        """
+        Register the coroutine function that replays a recorded request.
+
+        Args:
+            name (str): The request kind, e.g. "companies:page".
+            warmer (Warmer): Called with the recorded parameters as keyword arguments.
+        """
+        cls._warmers[name] = warmer
+
+    @classmethod
+    async def record(cls, name: str, params: dict[str, Any], sample_rate: float) -> None:
+        """
+        Count a request towards the popularity statistics, with probability `sample_rate`.
+
+        Args:
+            name (str): The request kind.
+            params (dict[str, Any]): Normalized parameters that reproduce the request.
+            sample_rate (float): Fraction of requests recorded.
+        """
+        if cls._warming.get() or random.random() >= sample_rate:
+            return
+        client = await RedisManager.get_client()
+        await client.zincrby(cls._key(name), 1, json_util.dumps(params, sort_keys=True))
+
+    @classmethod
+    async def warm_up(cls, top: int, timeout: float, max_tracked: int = 1000) -> int:
+        """
+        Replay the `top` most requested entries of every registered request kind.
+
+        Failures are logged and never prevent startup; the whole step is bounded by `timeout`.
+
+        Args:
+            top (int): Number of entries replayed per request kind; 0 disables warm-up.
+            timeout (float): Seconds after which warm-up is abandoned.
+            max_tracked (int): Entries kept per request kind; less popular ones are trimmed.
+
+        Returns:
+            int: The number of entries replayed.
+        """
+        if not top:
+            return 0
+        token = cls._warming.set(True)
+        warmed = 0
+        try:
+            async with asyncio.timeout(timeout):
+                client = await RedisManager.get_client()
+                for name, warmer in cls._warmers.items():
+                    key = cls._key(name)
+                    await client.zremrangebyrank(key, 0, -max_tracked - 1)
+                    for member in await client.zrevrange(key, 0, top - 1):
+                        try:
+                            await warmer(**json_util.loads(member))
+                            warmed += 1
+                        except Exception as e:
+                            print(f"Cache warm-up of {name} {member} failed: {e}")
+        except TimeoutError:
+            print(f"Cache warm-up stopped after {timeout}s")
+        except Exception as e:
+            print(f"Cache warm-up failed: {e}")
+        finally:
+            cls._warming.reset(token)
+        print(f"Cache warm-up replayed {warmed} entries")
+        return warmed
@@ -0,0 +1,251 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Literal
+from app.exceptions.auth import PasswordHasherBusyException
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+HashPolicy = tuple[tuple[str, Any], ...]
+
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 16
+ARGON2_MIN_TIME_COST = 2
+ARGON2_MAX_TIME_COST = 12
+ARGON2_PARALLELISM = 2
+
+@lru_cache(maxsize=8)
+def _get_context(policy: HashPolicy) -> "CryptContext":
+    """
+    Build (once per worker) the CryptContext described by a hashable policy.
+
+    Args:
+        policy (HashPolicy): CryptContext keyword arguments as a tuple of pairs.
+
+    Returns:
+        CryptContext: The configured passlib context.
+    """
+    from passlib.context import CryptContext
+    return CryptContext(**dict(policy))
+
+def _run(policy: HashPolicy, operation: str, *args: Any) -> tuple[Any, float]:
+    """
+    Execute a CryptContext operation inside a pool worker.
+
+    Returns:
+        tuple[Any, float]: The operation result and the time spent running it, in seconds.
+    """
+    started = time.perf_counter()
+    result = getattr(_get_context(policy), operation)(*args)
+    return result, time.perf_counter() - started
+
+def _measure(handler: Any) -> float:
+    """Return the seconds a single hash takes with the given handler."""
+    started = time.perf_counter()
+    handler.hash("calibration-password")
+    return time.perf_counter() - started
+
+def argon2_available() -> bool:
+    """Return whether an argon2 backend (argon2-cffi) is installed."""
+    from passlib.hash import argon2
+    return argon2.has_backend()
+
+def calibrate_cost(scheme: Literal["bcrypt", "argon2"], target_ms: int, memory_kib: int) -> int:
+    """
+    Find the highest work factor whose hash time stays within the target latency.
+
+    The cost is never lowered below a safe floor, even if that floor is slower
+    than the target on this host.
+
+    Args:
+        scheme (str): "bcrypt" (cost = log2 rounds) or "argon2" (cost = time_cost).
+        target_ms (int): Desired per-hash latency in milliseconds.
+        memory_kib (int): Argon2 memory cost; ignored for bcrypt.
+
+    Returns:
+        int: The selected bcrypt rounds or argon2 time_cost.
+    """
+    from passlib.hash import argon2, bcrypt
+    target = target_ms / 1000
+    if scheme == "argon2":
+        cost, ceiling = ARGON2_MIN_TIME_COST, ARGON2_MAX_TIME_COST
+        using = lambda c: argon2.using(time_cost=c, memory_cost=memory_kib, parallelism=ARGON2_PARALLELISM)
+    else:
+        cost, ceiling = BCRYPT_MIN_ROUNDS, BCRYPT_MAX_ROUNDS
+        using = lambda c: bcrypt.using(rounds=c)
+
+    while cost < ceiling and _measure(using(cost + 1)) <= target:
+        cost += 1
+    return cost
+
+def build_policy(scheme: Literal["bcrypt", "argon2"], cost: int, memory_kib: int) -> HashPolicy:
+    """
+    Build a hashing policy that uses `cost` for new hashes and as a floor.
+
+    Hashes weaker than `cost` (or made with bcrypt, when argon2 is the active
+    scheme) are reported as needing an update, which drives rehash-on-login.
+    Stronger hashes are left alone, so a worker configured with a lower cost
+    never rehashes passwords another worker has just upgraded.
+
+    Args:
+        scheme (str): The active hashing scheme.
+        cost (int): bcrypt rounds or argon2 time_cost.
+        memory_kib (int): Argon2 memory cost; ignored for bcrypt.
+
+    Returns:
+        HashPolicy: CryptContext keyword arguments as a hashable tuple.
+    """
+    if scheme == "argon2":
+        return (
+            ("schemes", ("argon2", "bcrypt")),
+            ("deprecated", "auto"),
+            ("argon2__memory_cost", memory_kib),
+            ("argon2__parallelism", ARGON2_PARALLELISM),
+            ("argon2__default_rounds", cost),
+            ("argon2__min_rounds", cost),
+        )
+    return (
+        ("schemes", ("bcrypt",)),
+        ("deprecated", "auto"),
+        ("bcrypt__default_rounds", cost),
+        ("bcrypt__min_rounds", cost),
+    )
+
+
+class PasswordHasherPool:
+    """
+    Bounded worker pool that runs password hashing off the event loop.
+
+    Work is rejected with `PasswordHasherBusyException` as soon as the number of
+    in-flight jobs reaches `max_pending`, so a login burst cannot queue unbounded
+    CPU work behind the rest of the application.
+    """
+    _executor: Executor | None = None
+    _max_pending: int = 64
+    _pending: int = 0
+    _stats: dict[str, float] = {}
+
+    @classmethod
+    def start(
+        cls,
+        executor: Literal["thread", "process"] = "thread",
+        workers: int = 2,
+        max_pending: int = 64
+    ) -> None:
+        """
+        Create the worker pool.
+
+        Args:
+            executor (str): "thread" (bcrypt releases the GIL) or "process".
+            workers (int): Number of pool workers.
+            max_pending (int): Maximum queued plus running jobs before rejecting work.
+        """
+        if cls._executor:
+            return
+        if executor == "process":
+            cls._executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            cls._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hasher")
+        cls._max_pending = max_pending
+        cls._pending = 0
+        cls._stats = {
+            "completed": 0,
+            "rejected": 0,
+            "peak_pending": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "run_seconds_total": 0.0,
+        }
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """Stop the worker pool, waiting for running jobs to finish."""
+        if cls._executor:
+            cls._executor.shutdown(wait=True)
+            cls._executor = None
+
+    @classmethod
+    def _release(cls) -> None:
+        cls._pending -= 1
+
+    @classmethod
+    async def run(cls, policy: HashPolicy, operation: str, *args: Any) -> Any:
+        """
+        Run a CryptContext operation (`hash`, `verify`, ...) on the pool.
+
+        Args:
+            policy (HashPolicy): The CryptContext configuration to use.
+            operation (str): Name of the CryptContext method to call.
+            *args: Positional arguments for the operation.
+
+        Returns:
+            Any: The operation result.
+
+        Raises:
+            PasswordHasherBusyException: If the pool is saturated.
+        """
+        if not cls._executor:
+            cls.start()
+        assert cls._executor is not None
+
+        if cls._pending >= cls._max_pending:
+            cls._stats["rejected"] += 1
+            raise PasswordHasherBusyException()
+
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+        future = cls._executor.submit(_run, policy, operation, *args)
+        # The slot is released when the job finishes, not when the caller stops
+        # waiting, so cancelled requests still count against the bound.
+        cls._pending += 1
+        cls._stats["peak_pending"] = max(cls._stats["peak_pending"], cls._pending)
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(cls._release))
+
+        result, run_seconds = await asyncio.wrap_future(future, loop=loop)
+
+        wait_seconds = max(time.perf_counter() - submitted - run_seconds, 0.0)
+        cls._stats["completed"] += 1
+        cls._stats["wait_seconds_total"] += wait_seconds
+        cls._stats["wait_seconds_max"] = max(cls._stats["wait_seconds_max"], wait_seconds)
+        cls._stats["run_seconds_total"] += run_seconds
+        return result
+
+    @classmethod
+    async def calibrate(cls, scheme: Literal["bcrypt", "argon2"], target_ms: int, memory_kib: int) -> int:
+        """
+        Run `calibrate_cost` on a pool worker so it measures the hashing environment.
+
+        Returns:
+            int: The selected bcrypt rounds or argon2 time_cost.
+        """
+        if not cls._executor:
+            cls.start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(cls._executor, calibrate_cost, scheme, target_ms, memory_kib)
+
+    @classmethod
+    def stats(cls) -> dict[str, Any]:
+        """
+        Return queue depth and wait-time metrics for the pool.
+
+        Returns:
+            dict[str, Any]: Current and peak queue depth, rejections, and average/max
+            wait and run times in milliseconds.
+        """
+        completed = cls._stats.get("completed", 0) or 0
+        return {
+            "pending": cls._pending,
+            "max_pending": cls._max_pending,
+            "peak_pending": cls._stats.get("peak_pending", 0),
+            "completed": completed,
+            "rejected": cls._stats.get("rejected", 0),
+            "avg_wait_ms": (cls._stats["wait_seconds_total"] / completed * 1000) if completed else 0.0,
+            "max_wait_ms": cls._stats.get("wait_seconds_max", 0.0) * 1000,
+            "avg_run_ms": (cls._stats["run_seconds_total"] / completed * 1000) if completed else 0.0,
+        }
@@ -0,0 +1,114 @@
+import json
+import time
+from typing import Any
+from app.common.cache import LocalCache, MISSING
+from app.database.redis import RedisManager
+from app.database.pubsub import PubSubManager
+from .settings import settings
+
+class PrincipalCache:
+    """
+    Caches authenticated principals by token subject.
+
+    Lookups go to an in-process LRU first and to Redis second. Entries never
+    outlive the token that populated them, and are invalidated on every worker
+    when the underlying `Auth` or `User` document changes.
+    """
+    channel: str = "principal:invalidate"
+    _local: LocalCache = LocalCache(max_entries=settings.principal_cache_max_entries)
+
+    @staticmethod
+    def _key(username: str) -> str:
+        return f"principal:{username}"
+
+    @staticmethod
+    def _owner_key(document_id: Any) -> str:
+        return f"principal:owner:{document_id}"
+
+    @classmethod
+    async def get(cls, username: str) -> dict[str, Any] | None:
+        """
+        Return the cached principal payload for a username, if any.
+
+        Args:
+            username (str): The token subject.
+
+        Returns:
+            dict[str, Any] | None: The serialized `auth` and `user` documents.
+        """
+        payload = cls._local.get(username)
+        if payload is not MISSING:
+            return payload
+
+        client = await RedisManager.get_client()
+        cached = await client.get(cls._key(username))
+        if not cached:
+            return None
+
+        payload = json.loads(cached)
+        ttl = min(payload["expires_at"] - time.time(), settings.principal_cache_local_ttl)
+        cls._local.set(username, payload, ttl)
+        return payload
+
+    @classmethod
+    async def set(
+        cls,
+        username: str,
+        payload: dict[str, Any],
+        document_ids: list[Any],
+        token_exp: float
+    ) -> None:
+        """
+        Cache a principal until the configured TTL or the token expiry, whichever comes first.
+
+        Args:
+            username (str): The token subject.
+            payload (dict[str, Any]): JSON-serializable principal data.
+            document_ids (list[Any]): Ids of the documents the payload was built from.
+            token_exp (float): The token's `exp` claim as a UNIX timestamp.
+        """
+        ttl = int(min(settings.principal_cache_ttl, token_exp - time.time()))
+        if ttl <= 0:
+            return
+        payload = {**payload, "expires_at": time.time() + ttl}
+
+        client = await RedisManager.get_client()
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.set(cls._key(username), json.dumps(payload), ex=ttl)
+            for document_id in document_ids:
+                pipe.set(cls._owner_key(document_id), username, ex=ttl)
+            await pipe.execute()
+        cls._local.set(username, payload, min(ttl, settings.principal_cache_local_ttl))
+
+    @classmethod
+    async def invalidate(cls, username: str | None = None, document_id: Any = None) -> None:
+        """
+        Drop a principal from Redis and from every worker's local cache.
+
+        Args:
+            username (str | None): The subject to invalidate, when known.
+            document_id (Any): An `Auth` or `User` id; resolves the subject it was cached under.
+        """
+        client = await RedisManager.get_client()
+        usernames = {username} if username else set()
+        if document_id is not None:
+            owner = await client.get(cls._owner_key(document_id))
+            if owner:
+                usernames.add(owner)
+
+        for name in usernames:
+            cls._local.delete(name)
+            await client.delete(cls._key(name))
+            await PubSubManager.publish(cls.channel, name)
+
+    @classmethod
+    def _on_invalidate(cls, username: str) -> None:
+        cls._local.delete(username)
+
+    @classmethod
+    def stats(cls) -> dict[str, Any]:
+        """Return local cache statistics."""
+        return cls._local.stats()
+
+
+PubSubManager.subscribe(PrincipalCache.channel, PrincipalCache._on_invalidate, resync=PrincipalCache._local.clear)
@@ -0,0 +1,99 @@
+import time
+from typing import Any
+from app.common.bloom import BloomFilter
+from app.database.redis import RedisManager
+from app.database.pubsub import PubSubManager
+from .settings import settings
+
+class RevocationService:
+    """
+    Tracks revoked token ids (`jti`).
+
+    Redis holds the authoritative set as a sorted set scored by token expiry.
+    Every worker mirrors it in a local Bloom filter kept in sync over pub/sub, so
+    only filter hits need a Redis round trip to confirm. While the filter is not
+    in sync (before the first rebuild after startup, or while the pub/sub
+    connection is down) every check goes to Redis instead.
+    """
+    key: str = "revoked_tokens"
+    channel: str = "revocation:added"
+    _filter: BloomFilter = BloomFilter(settings.revocation_bloom_capacity, settings.revocation_bloom_error_rate)
+    _stats: dict[str, int] = {"checks": 0, "filter_hits": 0, "false_positives": 0, "unsynced_checks": 0, "confirmed": 0}
+
+    @classmethod
+    async def revoke(cls, jti: str, exp: float) -> None:
+        """
+        Revoke a token until its expiry.
+
+        Args:
+            jti (str): The token id.
+            exp (float): The token's `exp` claim; the entry is pruned after it.
+        """
+        client = await RedisManager.get_client()
+        await client.zadd(cls.key, {jti: exp})
+        cls._filter.add(jti)
+        await PubSubManager.publish(cls.channel, jti)
+
+    @classmethod
+    async def is_revoked(cls, jti: str | None) -> bool:
+        """
+        Return whether a token id has been revoked.
+
+        Args:
+            jti (str | None): The token id; tokens without one cannot be revoked.
+        """
+        if not jti:
+            return False
+        cls._stats["checks"] += 1
+        synced = PubSubManager.synced()
+        if not synced:
+            cls._stats["unsynced_checks"] += 1
+        elif jti not in cls._filter:
+            return False
+        else:
+            cls._stats["filter_hits"] += 1
+        client = await RedisManager.get_client()
+        exp = await client.zscore(cls.key, jti)
+        if exp is None or exp <= time.time():
+            if synced:
+                cls._stats["false_positives"] += 1
+            return False
+        cls._stats["confirmed"] += 1
+        return True
+
+    @classmethod
+    async def rebuild(cls) -> None:
+        """Prune expired entries and rebuild the local filter from Redis."""
+        client = await RedisManager.get_client()
+        now = time.time()
+        await client.zremrangebyscore(cls.key, "-inf", now)
+        revoked = await client.zrangebyscore(cls.key, now, "+inf")
+
+        bloom = BloomFilter(
+            max(settings.revocation_bloom_capacity, len(revoked) * 2),
+            settings.revocation_bloom_error_rate
+        )
+        for jti in revoked:
+            bloom.add(jti)
+        cls._filter = bloom
+
+    @classmethod
+    async def _on_revoked(cls, jti: str) -> None:
+        # A worker also receives its own publish, after `revoke` already added the id.
+        if jti in cls._filter:
+            return
+        cls._filter.add(jti)
+        if cls._filter.count > cls._filter.capacity:
+            await cls.rebuild()
+
+    @classmethod
+    def stats(cls) -> dict[str, Any]:
+        """Return filter size and lookup counters."""
+        return {
+            **cls._stats,
+            "filter_entries": cls._filter.count,
+            "filter_capacity": cls._filter.capacity,
+        }
+
+
+PubSubManager.subscribe(RevocationService.channel, RevocationService._on_revoked, resync=RevocationService.rebuild)
@@ -1,75 +1,239 @@
-import jwt
-from passlib.context import CryptContext
+import hashlib
+import time
+import uuid
 from fastapi.security import OAuth2PasswordBearer
 from app.models.auth import Auth
 from app.models.user import User
 from datetime import timedelta, datetime, timezone
 from typing import Annotated, Any
 from fastapi import Depends
-from jwt.exceptions import InvalidTokenError, ExpiredSignatureError
+from bson import DBRef
+from beanie import Link, PydanticObjectId
 from .settings import settings
+from .hashing import PasswordHasherPool, HashPolicy, argon2_available, build_policy
+from .principal import PrincipalCache
+from .revocation import RevocationService
+from app.common.cache import LocalCache, MISSING
+from app.database.redis import RedisManager
 from app.exceptions.auth import TokenCredentialsException
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+# Stands in for the password hash in principals rebuilt from the cache; it is
+# not a valid hash, so it can never verify a password.
+CACHED_PASSWORD_PLACEHOLDER = "!not-loaded"
+
 class PasswordService:
-    """Handles password hashing and verification."""
-    _pwd_context: CryptContext = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    """Handles password hashing and verification on the hashing worker pool."""
+    _policy: HashPolicy = (("schemes", ("bcrypt",)), ("deprecated", "auto"))
 
     @classmethod
-    def hash_password(cls, password: str) -> str:
-        return cls._pwd_context.hash(password)
+    async def configure(cls) -> HashPolicy:
+        """
+        Select the hashing parameters for this worker.
+
+        Uses `PASSWORD_HASH_COST` when set; otherwise the cost shared by the
+        fleet in Redis, which the first worker to start calibrates against
+        `PASSWORD_HASH_TARGET_MS`. Every worker therefore hashes with the same
+        cost, and a restart does not time hashes again.
+
+        Returns:
+            HashPolicy: The active hashing policy.
+        """
+        scheme = settings.password_hash_scheme
+        if scheme == "argon2" and not argon2_available():
+            print("argon2 backend not installed, falling back to bcrypt")
+            scheme = "bcrypt"
+
+        cost = settings.password_hash_cost
+        if cost is None:
+            cost = await cls.shared_cost(scheme)
+
+        cls._policy = build_policy(scheme, cost, settings.password_hash_argon2_memory_kib)
+        return cls._policy
 
     @classmethod
-    def verify_password(cls, plain_password: str, hashed_password: str) -> bool:
-        return cls._pwd_context.verify(plain_password, hashed_password)
+    async def shared_cost(cls, scheme: str) -> int:
+        """
+        Return the fleet-wide calibrated cost, calibrating it if no worker has yet.
+
+        The first calibration stored wins; workers that calibrated concurrently
+        adopt it. The key includes the target and memory settings, so changing
+        them triggers a new calibration.
+
+        Args:
+            scheme (str): The active hashing scheme.
+
+        Returns:
+            int: The bcrypt rounds or argon2 time_cost.
+        """
+        key = (
+            f"password_hash:cost:{scheme}:{settings.password_hash_target_ms}"
+            f":{settings.password_hash_argon2_memory_kib}"
+        )
+        client = await RedisManager.get_client()
+        stored = await client.get(key)
+        if stored is not None:
+            return int(stored)
+
+        cost = await PasswordHasherPool.calibrate(
+            scheme, settings.password_hash_target_ms, settings.password_hash_argon2_memory_kib
+        )
+        await client.set(key, cost, nx=True)
+        cost = int(await client.get(key))
+        print(f"Password hashing calibrated: {scheme} cost={cost}")
+        return cost
+
+    @classmethod
+    async def hash_password(cls, password: str) -> str:
+        return await PasswordHasherPool.run(cls._policy, "hash", password)
+
+    @classmethod
+    async def verify_password(cls, plain_password: str, hashed_password: str) -> bool:
+        return await PasswordHasherPool.run(cls._policy, "verify", plain_password, hashed_password)
+
+    @classmethod
+    async def verify_and_update(cls, plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """
+        Verify a password and, if its hash uses outdated parameters, rehash it.
+
+        Returns:
+            tuple[bool, str | None]: Whether the password matched, and the new hash
+            to store when the existing one needs upgrading.
+        """
+        return await PasswordHasherPool.run(cls._policy, "verify_and_update", plain_password, hashed_password)
 
 class TokenService:
     """Handles token managament."""
-    
+    _verified: LocalCache = LocalCache(max_entries=settings.token_cache_max_entries)
+
     @classmethod
     def create_access_token(cls, data: dict[str, Any], expires_delta: timedelta | None = None) -> str:
         to_encode = data.copy()
         expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=15))
-        to_encode.update({"exp": expire})
+        to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
+        import jwt
         return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     
     @classmethod
     def decode_access_token(cls, token: str) -> dict:
+        """
+        Verify and decode a token, memoizing the result until the token expires.
+
+        Invalid tokens are remembered for `TOKEN_CACHE_NEGATIVE_TTL` seconds so
+        replaying them is rejected without re-checking the signature.
+        """
+        key = hashlib.sha256(token.encode()).hexdigest()
+        cached = cls._verified.get(key)
+        if cached is not MISSING:
+            if cached is None:
+                raise TokenCredentialsException()
+            return dict(cached)
+
+        import jwt
         try:
             payload = jwt.decode(token, settings.secret_key, algorithms=[str(settings.algorithm)])
-            return payload
-        except ExpiredSignatureError:
-            raise TokenCredentialsException()
-        except InvalidTokenError:
+        except jwt.InvalidTokenError:
+            cls._verified.set(key, None, settings.token_cache_negative_ttl)
             raise TokenCredentialsException()
+
+        cls._verified.set(key, payload, payload.get("exp", 0) - time.time())
+        return dict(payload)
+
+    @classmethod
+    def stats(cls) -> dict[str, Any]:
+        """Return verified-token cache statistics."""
+        return cls._verified.stats()
     
 class AuthService:
     """Handles authentication."""
 
     @classmethod
     async def get_user_auth(cls, username: str) -> Auth | None:
-        return await Auth.find_one(Auth.username == username)
+        return await Auth.load_one("username", username)
 
     @classmethod
     async def authenticate_user(cls, username: str, password: str) -> Auth | None:
         auth = await cls.get_user_auth(username)
         if not auth:
             return None
-        if not PasswordService.verify_password(password, auth.password):
+        verified, new_hash = await PasswordService.verify_and_update(password, auth.password)
+        if not verified:
             return None
+        if new_hash:
+            await auth.set({Auth.password: new_hash})
         return auth
 
+    @classmethod
+    def _to_principal(cls, auth: Auth) -> dict[str, Any]:
+        """
+        Serialize an authenticated account for the principal cache.
+
+        The password hash is left out, so it is never copied to Redis or to the
+        workers' in-process caches; login always reads it from MongoDB.
+        """
+        user = None if isinstance(auth.user, Link) else auth.user.model_dump(mode="json")
+        return {
+            "auth": auth.model_dump(mode="json", exclude={"user", "password"}),
+            "user_id": str(auth.user_id),
+            "user": user,
+        }
+
+    @classmethod
+    def _from_principal(cls, principal: dict[str, Any]) -> Auth:
+        """
+        Rebuild the account from a cached principal.
+
+        The result carries `CACHED_PASSWORD_PLACEHOLDER` instead of the hash;
+        request handlers read the profile and ids, never the password.
+        """
+        if principal["user"] is None:
+            user: Any = DBRef(User.get_collection_name(), PydanticObjectId(principal["user_id"]))
+        else:
+            user = User.model_validate(principal["user"])
+        return Auth.model_validate({**principal["auth"], "password": CACHED_PASSWORD_PLACEHOLDER, "user": user})
+
     @classmethod
     async def get_current_auth(cls, token: Annotated[str, Depends(oauth2_scheme)]) -> Auth:
         payload = TokenService.decode_access_token(token)
         username: str | None = payload.get("sub")
         if username is None:
             raise TokenCredentialsException()
+        if await RevocationService.is_revoked(payload.get("jti")):
+            raise TokenCredentialsException()
+
+        principal = await PrincipalCache.get(username)
+        if principal:
+            return cls._from_principal(principal)
+
         auth = await cls.get_user_auth(username)
         if not auth:
             raise TokenCredentialsException()
-        await auth.fetch_link(Auth.user)
+        # In embedded mode the profile travels with the credentials, so the
+        # linked User is only fetched for accounts not yet migrated.
+        if settings.auth_profile_mode == "linked" or auth.profile is None:
+            user = await User.load_one("_id", auth.user_id)
+            if user:
+                auth.user = user
+        await PrincipalCache.set(
+            username,
+            cls._to_principal(auth),
+            document_ids=[auth.id, auth.user_id],
+            token_exp=payload.get("exp", 0)
+        )
         return auth
 
+    @classmethod
+    async def revoke_token(cls, token: str) -> None:
+        """
+        Revoke a token so it is rejected for the rest of its lifetime.
+
+        Args:
+            token (str): The bearer token to revoke.
+        """
+        payload = TokenService.decode_access_token(token)
+        jti = payload.get("jti")
+        if jti:
+            await RevocationService.revoke(jti, payload.get("exp", 0))
+
 auth_dependency = Annotated[Auth, Depends(AuthService.get_current_auth)]    
\ No newline at end of file
@@ -1,4 +1,5 @@
 import os
+from typing import Literal
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -8,6 +9,58 @@ class Settings(BaseSettings):
     access_token_expire_minutes: int = Field(..., alias="ACCESS_TOKEN_EXPIRE_MINUTES")
     mongo_db_uri: str = Field(..., alias="MONGO_DB_URI")
     redis_url: str = Field(..., alias="REDIS_URL")
+    mongo_max_pool_size: int | None = Field(None, ge=0, alias="MONGO_MAX_POOL_SIZE")
+    mongo_min_pool_size: int | None = Field(None, ge=0, alias="MONGO_MIN_POOL_SIZE")
+    mongo_max_idle_time_ms: int | None = Field(None, ge=0, alias="MONGO_MAX_IDLE_TIME_MS")
+    mongo_wait_queue_timeout_ms: int | None = Field(None, gt=0, alias="MONGO_WAIT_QUEUE_TIMEOUT_MS")
+    mongo_compressors: str | None = Field(None, alias="MONGO_COMPRESSORS")
+    mongo_read_preference: Literal["primary", "primaryPreferred", "secondary", "secondaryPreferred", "nearest"] | None = Field(None, alias="MONGO_READ_PREFERENCE")
+    mongo_read_concern: Literal["local", "available", "majority", "linearizable", "snapshot"] | None = Field(None, alias="MONGO_READ_CONCERN")
+    mongo_read_route_preference: Literal["primary", "primaryPreferred", "secondary", "secondaryPreferred", "nearest"] = Field("primary", alias="MONGO_READ_ROUTE_PREFERENCE")
+    mongo_read_route_concern: Literal["local", "available", "majority", "linearizable", "snapshot"] | None = Field(None, alias="MONGO_READ_ROUTE_CONCERN")
+    mongo_max_staleness_seconds: int = Field(-1, ge=-1, alias="MONGO_MAX_STALENESS_SECONDS")
+    mongo_sync_indexes: bool = Field(True, alias="MONGO_SYNC_INDEXES")
+    password_hash_executor: Literal["thread", "process"] = Field("thread", alias="PASSWORD_HASH_EXECUTOR")
+    password_hash_workers: int = Field(2, gt=0, alias="PASSWORD_HASH_WORKERS")
+    password_hash_max_pending: int = Field(64, gt=0, alias="PASSWORD_HASH_MAX_PENDING")
+    password_hash_scheme: Literal["bcrypt", "argon2"] = Field("bcrypt", alias="PASSWORD_HASH_SCHEME")
+    password_hash_target_ms: int = Field(250, gt=0, alias="PASSWORD_HASH_TARGET_MS")
+    password_hash_cost: int | None = Field(None, gt=0, alias="PASSWORD_HASH_COST")
+    password_hash_argon2_memory_kib: int = Field(65536, gt=0, alias="PASSWORD_HASH_ARGON2_MEMORY_KIB")
+    principal_cache_ttl: int = Field(300, gt=0, alias="PRINCIPAL_CACHE_TTL")
+    principal_cache_local_ttl: int = Field(30, ge=0, alias="PRINCIPAL_CACHE_LOCAL_TTL")
+    principal_cache_max_entries: int = Field(10000, gt=0, alias="PRINCIPAL_CACHE_MAX_ENTRIES")
+    token_cache_max_entries: int = Field(10000, gt=0, alias="TOKEN_CACHE_MAX_ENTRIES")
+    token_cache_negative_ttl: int = Field(5, ge=0, alias="TOKEN_CACHE_NEGATIVE_TTL")
+    revocation_bloom_capacity: int = Field(100000, gt=0, alias="REVOCATION_BLOOM_CAPACITY")
+    revocation_bloom_error_rate: float = Field(0.001, gt=0, lt=1, alias="REVOCATION_BLOOM_ERROR_RATE")
+    auth_profile_mode: Literal["linked", "embedded"] = Field("linked", alias="AUTH_PROFILE_MODE")
+    loader_batch_window_ms: float = Field(0, ge=0, alias="LOADER_BATCH_WINDOW_MS")
+    loader_max_batch: int = Field(500, gt=0, alias="LOADER_MAX_BATCH")
+    query_cache_ttl: int = Field(3600, ge=0, alias="QUERY_CACHE_TTL")
+    query_cache_stale_ttl: int = Field(300, ge=0, alias="QUERY_CACHE_STALE_TTL")
+    query_cache_early_refresh_beta: float = Field(1.0, ge=0, alias="QUERY_CACHE_EARLY_REFRESH_BETA")
+    query_cache_l1_ttl: int = Field(60, ge=0, alias="QUERY_CACHE_L1_TTL")
+    query_cache_l1_max_entries: int = Field(10000, gt=0, alias="QUERY_CACHE_L1_MAX_ENTRIES")
+    query_cache_l1_max_bytes: int = Field(64 * 1024 * 1024, gt=0, alias="QUERY_CACHE_L1_MAX_BYTES")
+    query_cache_serializer: Literal["bson", "msgpack", "json"] = Field("bson", alias="QUERY_CACHE_SERIALIZER")
+    query_cache_compression: Literal["zstd", "lz4", "zlib", "none"] = Field("zstd", alias="QUERY_CACHE_COMPRESSION")
+    query_cache_compress_min_bytes: int = Field(1024, ge=0, alias="QUERY_CACHE_COMPRESS_MIN_BYTES")
+    uncovered_query_policy: Literal["warn", "reject"] = Field("warn", alias="UNCOVERED_QUERY_POLICY")
+    index_cache_ttl: int = Field(300, gt=0, alias="INDEX_CACHE_TTL")
+    bulk_insert_chunk_size: int = Field(500, gt=0, le=10000, alias="BULK_INSERT_CHUNK_SIZE")
+    bulk_max_row_bytes: int = Field(64 * 1024, gt=0, alias="BULK_MAX_ROW_BYTES")
+    bulk_max_body_bytes: int = Field(64 * 1024 * 1024, gt=0, alias="BULK_MAX_BODY_BYTES")
+    bulk_spool_memory_bytes: int = Field(1024 * 1024, ge=0, alias="BULK_SPOOL_MEMORY_BYTES")
+    export_batch_size: int = Field(1000, gt=0, alias="EXPORT_BATCH_SIZE")
+    search_cache_ttl: int = Field(30, ge=0, alias="SEARCH_CACHE_TTL")
+    paginate_total_cache_ttl: int = Field(30, ge=0, alias="PAGINATE_TOTAL_CACHE_TTL")
+    query_cache_date_bucket: int = Field(1, ge=1, alias="QUERY_CACHE_DATE_BUCKET")
+    cache_warmup_pages: int = Field(50, ge=0, alias="CACHE_WARMUP_PAGES")
+    cache_warmup_sample_rate: float = Field(0.1, ge=0, le=1, alias="CACHE_WARMUP_SAMPLE_RATE")
+    cache_warmup_timeout: float = Field(10, gt=0, alias="CACHE_WARMUP_TIMEOUT")
+    query_cache_lock_ttl: float = Field(10, gt=0, alias="QUERY_CACHE_LOCK_TTL")
+    query_cache_lock_timeout: float = Field(5, gt=0, alias="QUERY_CACHE_LOCK_TIMEOUT")
     
     model_config = {
         "env_file": ".env",
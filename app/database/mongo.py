@@ -1,21 +1,66 @@
+from typing import Any
 from pymongo import AsyncMongoClient
 from beanie import init_beanie
+from app.conf.settings import settings
+from .pool_monitor import PoolMonitor
 from app.models.auth import Auth
 from app.models.user import User
 from app.models.company import Company
 
 class MongoDB:
     client: AsyncMongoClient | None = None
+    pool_monitor: PoolMonitor = PoolMonitor()
+
+    @staticmethod
+    def client_options() -> dict[str, Any]:
+        """
+        Build the driver options from the settings.
+
+        Unset options are left out, so the URI or the driver default applies.
+
+        Returns:
+            dict[str, Any]: Keyword arguments for `AsyncMongoClient`.
+        """
+        options = {
+            "maxPoolSize": settings.mongo_max_pool_size,
+            "minPoolSize": settings.mongo_min_pool_size,
+            "maxIdleTimeMS": settings.mongo_max_idle_time_ms,
+            "waitQueueTimeoutMS": settings.mongo_wait_queue_timeout_ms,
+            "compressors": settings.mongo_compressors,
+            "readPreference": settings.mongo_read_preference,
+            "readConcernLevel": settings.mongo_read_concern,
+        }
+        if settings.mongo_read_preference not in (None, "primary") and settings.mongo_max_staleness_seconds > 0:
+            options["maxStalenessSeconds"] = settings.mongo_max_staleness_seconds
+        return {name: value for name, value in options.items() if value is not None}
 
     @classmethod
-    async def connect_db(cls, uri: str):
+    async def connect_db(cls, uri: str, sync_indexes: bool | None = None, drop_indexes: bool = False):
         """
         Initialize and connect to MongoDB database
+
+        Args:
+            uri (str): The MongoDB connection string.
+            sync_indexes (bool | None): Create the declared indexes; defaults to
+                `MONGO_SYNC_INDEXES`. Workers skip it when indexes are synced by
+                the `sync_indexes` command, which saves round trips on every boot.
+            drop_indexes (bool): Also drop indexes the models no longer declare.
         """
+        if sync_indexes is None:
+            sync_indexes = settings.mongo_sync_indexes
         try:
-            cls.client = AsyncMongoClient(uri)
+            cls.client = AsyncMongoClient(uri, event_listeners=[cls.pool_monitor], **cls.client_options())
             db = cls.client.get_default_database()
-            await init_beanie(database=db, document_models=[Auth, User, Company])
+            await init_beanie(
+                database=db,
+                document_models=[Auth, User, Company],
+                skip_indexes=not sync_indexes,
+                allow_index_dropping=drop_indexes
+            )
+            if sync_indexes:
+                # Plans must not hint an index the sync just dropped.
+                for document in (Auth, User, Company):
+                    document.forget_indexes()
             print(f"Database {db.name} connected")
             return db
         except Exception as e:
@@ -32,4 +77,12 @@ class MongoDB:
             cls.client = None
             print("MongoDB disconnected")
         else:
-            print("No MongoDB client connected")
\ No newline at end of file
+            print("No MongoDB client connected")
+
+    @classmethod
+    def pool_stats(cls) -> dict[str, Any]:
+        """
+        Return connection pool utilization per server.
+        """
+        max_pool_size = cls.client.options.pool_options.max_pool_size if cls.client else None
+        return cls.pool_monitor.stats(max_pool_size)
@@ -0,0 +1,103 @@
+from collections import defaultdict
+from typing import Any
+from pymongo.monitoring import (
+    ConnectionCheckedInEvent,
+    ConnectionCheckedOutEvent,
+    ConnectionCheckOutFailedEvent,
+    ConnectionClosedEvent,
+    ConnectionCreatedEvent,
+    ConnectionPoolListener,
+    PoolClearedEvent,
+    PoolClosedEvent,
+    PoolCreatedEvent,
+    PoolReadyEvent,
+    ConnectionCheckOutStartedEvent,
+    ConnectionReadyEvent,
+)
+
+def _address(address: tuple[str, int | None]) -> str:
+    host, port = address
+    return f"{host}:{port}" if port else host
+
+class PoolMonitor(ConnectionPoolListener):
+    """
+    Tracks connection pool utilization per server (each mongos in a sharded cluster).
+
+    Registered as a driver event listener; `stats` reports open and checked-out
+    connections, their peak, checkout wait times and failures, which is what
+    pool sizes are tuned against.
+    """
+
+    def __init__(self) -> None:
+        self._pools: dict[str, dict[str, Any]] = defaultdict(lambda: {
+            "open": 0,
+            "in_use": 0,
+            "max_in_use": 0,
+            "checkouts": 0,
+            "checkout_failures": 0,
+            "checkout_wait_seconds_total": 0.0,
+            "checkout_wait_seconds_max": 0.0,
+            "cleared": 0,
+        })
+
+    def pool_created(self, event: PoolCreatedEvent) -> None:
+        self._pools[_address(event.address)]
+
+    def pool_ready(self, event: PoolReadyEvent) -> None:
+        pass
+
+    def pool_cleared(self, event: PoolClearedEvent) -> None:
+        self._pools[_address(event.address)]["cleared"] += 1
+
+    def pool_closed(self, event: PoolClosedEvent) -> None:
+        self._pools.pop(_address(event.address), None)
+
+    def connection_created(self, event: ConnectionCreatedEvent) -> None:
+        self._pools[_address(event.address)]["open"] += 1
+
+    def connection_ready(self, event: ConnectionReadyEvent) -> None:
+        pass
+
+    def connection_closed(self, event: ConnectionClosedEvent) -> None:
+        pool = self._pools[_address(event.address)]
+        pool["open"] = max(pool["open"] - 1, 0)
+
+    def connection_check_out_started(self, event: ConnectionCheckOutStartedEvent) -> None:
+        pass
+
+    def connection_check_out_failed(self, event: ConnectionCheckOutFailedEvent) -> None:
+        self._pools[_address(event.address)]["checkout_failures"] += 1
+
+    def connection_checked_out(self, event: ConnectionCheckedOutEvent) -> None:
+        pool = self._pools[_address(event.address)]
+        pool["checkouts"] += 1
+        pool["in_use"] += 1
+        pool["max_in_use"] = max(pool["max_in_use"], pool["in_use"])
+        wait = event.duration or 0.0
+        pool["checkout_wait_seconds_total"] += wait
+        pool["checkout_wait_seconds_max"] = max(pool["checkout_wait_seconds_max"], wait)
+
+    def connection_checked_in(self, event: ConnectionCheckedInEvent) -> None:
+        pool = self._pools[_address(event.address)]
+        pool["in_use"] = max(pool["in_use"] - 1, 0)
+
+    def stats(self, max_pool_size: int | None) -> dict[str, Any]:
+        """
+        Return per-server pool statistics.
+
+        Args:
+            max_pool_size (int | None): The configured pool limit, to report utilization.
+
+        Returns:
+            dict[str, Any]: Counters and ratios keyed by server address.
+        """
+        stats = {}
+        for address, pool in self._pools.items():
+            checkouts = pool["checkouts"]
+            stats[address] = {
+                **pool,
+                "avg_checkout_wait_ms": pool["checkout_wait_seconds_total"] / checkouts * 1000 if checkouts else 0.0,
+                "utilization": pool["in_use"] / max_pool_size if max_pool_size else None,
+                "peak_utilization": pool["max_in_use"] / max_pool_size if max_pool_size else None,
+            }
+        return stats
@@ -0,0 +1,98 @@
+import asyncio
+import inspect
+from typing import Any, Awaitable, Callable
+from .redis import RedisManager
+
+Handler = Callable[[str], Awaitable[None] | None]
+Resync = Callable[[], Awaitable[None] | None]
+
+class PubSubManager:
+    """
+    Single Redis pub/sub listener shared by every in-process cache.
+
+    Handlers are registered per channel (usually at import time) and invoked for
+    each message. After every (re)connect the optional `resync` callbacks run,
+    since messages published while disconnected are lost. Until they have run,
+    and whenever the connection is down, `synced` is False and local state fed
+    by messages must not be trusted.
+    """
+    _handlers: dict[str, list[Handler]] = {}
+    _resyncs: list[Resync] = []
+    _task: asyncio.Task | None = None
+    _synced: bool = False
+
+    @classmethod
+    def subscribe(cls, channel: str, handler: Handler, resync: Resync | None = None) -> None:
+        """
+        Register a handler for a channel. Must be called before `start`.
+
+        Args:
+            channel (str): The Redis channel name.
+            handler (Handler): Called with each message payload.
+            resync (Resync | None): Called after each (re)connect to rebuild local state.
+        """
+        cls._handlers.setdefault(channel, []).append(handler)
+        if resync:
+            cls._resyncs.append(resync)
+
+    @classmethod
+    def synced(cls) -> bool:
+        """Return whether the listener is subscribed and every resync has completed."""
+        return cls._synced
+
+    @classmethod
+    async def publish(cls, channel: str, message: str) -> None:
+        """Publish a message to every worker listening on `channel`."""
+        client = await RedisManager.get_client()
+        await client.publish(channel, message)
+
+    @classmethod
+    async def start(cls) -> None:
+        """Start the background listener task."""
+        if cls._task or not cls._handlers:
+            return
+        cls._task = asyncio.create_task(cls._listen())
+
+    @classmethod
+    async def stop(cls) -> None:
+        """Stop the background listener task."""
+        if cls._task:
+            cls._task.cancel()
+            try:
+                await cls._task
+            except asyncio.CancelledError:
+                pass
+            cls._task = None
+        cls._synced = False
+
+    @staticmethod
+    async def _call(callback: Callable[..., Any], *args: Any) -> None:
+        try:
+            result = callback(*args)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            print(f"Pub/sub callback {getattr(callback, '__qualname__', callback)} failed: {e}")
+
+    @classmethod
+    async def _listen(cls) -> None:
+        while True:
+            try:
+                client = await RedisManager.get_client()
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(*cls._handlers.keys())
+                    for resync in cls._resyncs:
+                        await cls._call(resync)
+                    cls._synced = True
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        for handler in cls._handlers.get(message["channel"], []):
+                            await cls._call(handler, message["data"])
+            except asyncio.CancelledError:
+                cls._synced = False
+                raise
+            except Exception as e:
+                cls._synced = False
+                print(f"Redis pub/sub listener disconnected: {e}")
+                await asyncio.sleep(1)
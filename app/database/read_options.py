@@ -0,0 +1,86 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Literal, NamedTuple
+from pymongo.read_concern import ReadConcern
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred, _ServerMode
+
+ReadPreferenceName = Literal["primary", "primaryPreferred", "secondary", "secondaryPreferred", "nearest"]
+ReadConcernLevel = Literal["local", "available", "majority", "linearizable", "snapshot"]
+
+_MODES: dict[str, type[_ServerMode]] = {
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+class ReadOptions(NamedTuple):
+    """Read preference and read concern applied to the queries of the current context."""
+    preference: ReadPreferenceName
+    concern: ReadConcernLevel | None = None
+    max_staleness: int = -1
+
+    def collection_options(self) -> dict[str, Any]:
+        """
+        Build the keyword arguments for `Collection.with_options`.
+
+        Returns:
+            dict[str, Any]: `read_preference` and, when set, `read_concern`.
+        """
+        mode = _MODES.get(self.preference)
+        options: dict[str, Any] = {
+            "read_preference": mode(max_staleness=self.max_staleness) if mode else Primary()
+        }
+        if self.concern:
+            options["read_concern"] = ReadConcern(self.concern)
+        return options
+
+_current: ContextVar[ReadOptions | None] = ContextVar("mongo_read_options", default=None)
+
+def current_read_options() -> ReadOptions | None:
+    """Return the read options of the current context, if any were declared."""
+    return _current.get()
+
+@contextmanager
+def reading(
+    preference: ReadPreferenceName,
+    concern: ReadConcernLevel | None = None,
+    max_staleness: int = -1
+) -> Iterator[None]:
+    """
+    Route the queries issued inside the block with the given read options.
+
+    Writes are unaffected; they always go to the primary.
+
+    Args:
+        preference (ReadPreferenceName): Which members may serve reads.
+        concern (ReadConcernLevel | None): The read concern level, or the client default.
+        max_staleness (int): Maximum replication lag in seconds for secondaries; -1 for none.
+    """
+    token = _current.set(ReadOptions(preference, concern, max_staleness))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+def read_from(
+    preference: ReadPreferenceName,
+    concern: ReadConcernLevel | None = None,
+    max_staleness: int = -1
+):
+    """
+    Build a FastAPI dependency that applies read options to a whole request.
+
+    Each request runs in its own context, so the options never leak into other requests.
+
+    Args:
+        preference (ReadPreferenceName): Which members may serve reads.
+        concern (ReadConcernLevel | None): The read concern level, or the client default.
+        max_staleness (int): Maximum replication lag in seconds for secondaries; -1 for none.
+    """
+    options = ReadOptions(preference, concern, max_staleness)
+
+    async def apply_read_options() -> None:
+        _current.set(options)
+
+    return apply_read_options
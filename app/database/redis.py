@@ -4,6 +4,7 @@ from app.conf.settings import settings
 class RedisManager:
     url: str = settings.redis_url
     _client: redis.Redis | None = None
+    _binary_client: redis.Redis | None = None
 
     @classmethod
     async def connect(cls):
@@ -21,6 +22,9 @@ class RedisManager:
         if cls._client:
             await cls._client.close()
             cls._client = None
+        if cls._binary_client:
+            await cls._binary_client.close()
+            cls._binary_client = None
             
     @classmethod
     async def get_client(cls) -> redis.Redis:
@@ -28,4 +32,11 @@ class RedisManager:
         if not cls._client:
             await cls.connect()
         assert cls._client is not None 
-        return cls._client
\ No newline at end of file
+        return cls._client
+
+    @classmethod
+    async def get_binary_client(cls) -> redis.Redis:
+        """Return a Redis client that reads and writes raw bytes, for encoded cache values."""
+        if not cls._binary_client:
+            cls._binary_client = await redis.from_url(cls.url, decode_responses=False)
+        return cls._binary_client
@@ -1,6 +1,10 @@
 from pydantic import Field
+from typing import Literal
 from app.common.schema import CommonBaseModel
 
+CompanyField = Literal["ticker", "name", "country", "address"]
+CompanySortField = Literal["ticker", "name", "created_at"]
+
 class BaseCompany(CommonBaseModel):
     ticker: str = Field(
         ...,
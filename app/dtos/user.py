@@ -31,4 +31,20 @@ class UserUpdate(CommonBaseModel):
                 raise UserInvalidBirthdayException()
         return v
 
-    
\ No newline at end of file
+
+class UserProfile(CommonBaseModel):
+    first_name: str | None = Field(
+        default=None,
+        title="First Name",
+        description="The user's given name."
+    )
+    last_name: str | None = Field(
+        default=None,
+        title="Last Name",
+        description="The user's family name or surname."
+    )
+    birthday: datetime | None = Field(
+        default=None,
+        title="Birthday",
+        description="The user's date of birth."
+    )
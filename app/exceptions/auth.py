@@ -12,4 +12,9 @@ class InvalidCredentialsException(Exception):
 class TokenCredentialsException(Exception):
     def __init__(self):
         self.message = "Could not validate credentials"
-        super().__init__(self.message)
\ No newline at end of file
+        super().__init__(self.message)
+        
+class PasswordHasherBusyException(Exception):
+    def __init__(self):
+        self.message = "Authentication service is busy, please retry shortly"
+        super().__init__(self.message)
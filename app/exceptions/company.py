@@ -6,4 +6,9 @@ class CompanyNotFoundException(Exception):
 class CompanyAlreadyExistsException(Exception):
     def __init__(self) -> None:
         self.message = "This company already exists"
+        super().__init__(self.message)
+
+class BulkBodyTooLargeException(Exception):
+    def __init__(self, max_bytes: int) -> None:
+        self.message = f"Bulk upload exceeds {max_bytes} bytes"
         super().__init__(self.message)
\ No newline at end of file
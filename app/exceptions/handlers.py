@@ -1,9 +1,15 @@
 from fastapi import Request, FastAPI, status
 from fastapi.responses import JSONResponse
 from typing import Type, Dict, Any
-from .auth import UserAlreadyExistsException, InvalidCredentialsException, TokenCredentialsException
+from .auth import (
+    UserAlreadyExistsException,
+    InvalidCredentialsException,
+    TokenCredentialsException,
+    PasswordHasherBusyException,
+)
 from .user import UserNotFoundException, UserInvalidBirthdayException
-from .company import CompanyNotFoundException, CompanyAlreadyExistsException
+from .company import CompanyNotFoundException, CompanyAlreadyExistsException, BulkBodyTooLargeException
+from .query import UncoveredQueryException, InvalidCursorException
 
 EXCEPTION_MAP: Dict[Type[Exception], Dict[str, Any]] = {
     UserAlreadyExistsException: {"status_code": status.HTTP_400_BAD_REQUEST},
@@ -12,7 +18,11 @@ EXCEPTION_MAP: Dict[Type[Exception], Dict[str, Any]] = {
     TokenCredentialsException: {"status_code": status.HTTP_401_UNAUTHORIZED},
     CompanyNotFoundException: {"status_code": status.HTTP_404_NOT_FOUND},
     CompanyAlreadyExistsException: {"status_code": status.HTTP_400_BAD_REQUEST},
+    BulkBodyTooLargeException: {"status_code": status.HTTP_413_REQUEST_ENTITY_TOO_LARGE},
     UserInvalidBirthdayException: {"status_code": status.HTTP_400_BAD_REQUEST},
+    PasswordHasherBusyException: {"status_code": status.HTTP_503_SERVICE_UNAVAILABLE, "headers": {"Retry-After": "1"}},
+    UncoveredQueryException: {"status_code": status.HTTP_400_BAD_REQUEST},
+    InvalidCursorException: {"status_code": status.HTTP_400_BAD_REQUEST},
 }
 
 async def generic_exception_handler(request: Request, exc: Exception):
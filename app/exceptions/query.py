@@ -0,0 +1,10 @@
+class UncoveredQueryException(Exception):
+    def __init__(self, shape: str):
+        self.shape = shape
+        self.message = f"No index supports this query ({shape})"
+        super().__init__(self.message)
+        
+class InvalidCursorException(Exception):
+    def __init__(self):
+        self.message = "Invalid or expired pagination cursor"
+        super().__init__(self.message)
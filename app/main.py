@@ -1,23 +1,43 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.database.mongo import MongoDB
 from app.database.redis import RedisManager
+from app.database.pubsub import PubSubManager
+from app.common.warmup import CacheWarmer
 from app.routes.auth import auth_router
 from app.routes.user import user_router
 from app.routes.company import company_router
+from app.routes.metrics import metrics_router
 from app.conf.settings import settings
+from app.conf.hashing import PasswordHasherPool
+from app.conf.security import PasswordService
 from app.exceptions.handlers import register_exception_handlers
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    PasswordHasherPool.start(
+        executor=settings.password_hash_executor,
+        workers=settings.password_hash_workers,
+        max_pending=settings.password_hash_max_pending
+    )
     await MongoDB.connect_db(settings.mongo_db_uri)
     await RedisManager.connect()
+    await PasswordService.configure()
+    await PubSubManager.start()
+    # Warm-up runs while the worker already serves requests; until it finishes,
+    # misses simply load from the database.
+    warm_up = asyncio.create_task(CacheWarmer.warm_up(settings.cache_warmup_pages, settings.cache_warmup_timeout))
     try:
         yield
     finally:
+        warm_up.cancel()
+        await asyncio.gather(warm_up, return_exceptions=True)
+        await PubSubManager.stop()
         await MongoDB.disconnect_db()
         await RedisManager.close()
+        PasswordHasherPool.shutdown()
     
 app = FastAPI(lifespan=lifespan, version="v1")
 
@@ -39,4 +59,5 @@ register_exception_handlers(app)
 
 app.include_router(auth_router)
 app.include_router(user_router)
-app.include_router(company_router)
\ No newline at end of file
+app.include_router(company_router)
+app.include_router(metrics_router)
\ No newline at end of file
@@ -1,23 +1,39 @@
-from beanie import Link, Indexed, before_event, Delete
-from typing import Annotated
+from beanie import Link, Indexed, before_event, after_event, Delete, Update, Save, Replace, SaveChanges
+from typing import Annotated, Any, ClassVar
 from pydantic import Field, EmailStr
+from pymongo import IndexModel
 from .user import User
 from app.common.model import CommonDocument
 from app.dtos.auth import BaseAuth
+from app.dtos.user import UserProfile
+from app.conf.principal import PrincipalCache
 
 class Auth(CommonDocument):
     """
         Auth document representing user authentication credentials.
         
-        Stores the username, password, email, and a link to the related User document.
+        Stores the username, password, email, a link to the related User document,
+        and a denormalized copy of that user's profile so it can be read with the
+        credentials in a single query.
     """
     username: Annotated[str, Indexed(unique=True)] = Field(..., min_length=3, max_length=20)
     password: str = Field(..., min_length=6)
     email: EmailStr = Field(...)
     user: Link[User]
+    profile: UserProfile | None = Field(default=None)
+
+    shard_key: ClassVar[tuple[tuple[str, int | str], ...]] = (("username", 1),)
     
     class Settings:
         name = "auth"
+        indexes = [IndexModel([("user.$id", 1)])]
+
+    @property
+    def user_id(self) -> Any:
+        """The linked User id, whether or not the link has been fetched."""
+        if isinstance(self.user, Link):
+            return self.user.ref.id
+        return self.user.id
 
     @classmethod
     def from_dto(cls, data: BaseAuth, user: User) -> "Auth":
@@ -35,7 +51,8 @@ class Auth(CommonDocument):
             username=data.username,
             password=data.password,
             email=data.email,
-            user=user  # type: ignore
+            user=user,  # type: ignore
+            profile=User.to_profile(user)
         )
 
     @classmethod
@@ -63,5 +80,17 @@ class Auth(CommonDocument):
             This ensures that when an Auth instance is removed, the associated User is
             also removed to maintain data integrity.
         """  
-        if self.user:
+        if isinstance(self.user, Link):
+            await User.find(User.id == self.user.ref.id).delete()
+        elif self.user:
             await self.user.delete() # type: ignore
+
+    @after_event(Update, Save, Replace, SaveChanges, Delete)
+    async def invalidate_principal(self):
+        """
+            Drop the cached principal for this account after it changes or is deleted.
+
+            The document id is passed as well, so a principal cached under a previous
+            username is also removed.
+        """
+        await PrincipalCache.invalidate(username=self.username, document_id=self.id)
@@ -1,9 +1,12 @@
 from beanie import Indexed
-from beanie.operators import Or
-from pydantic import Field
-from typing import Annotated, Any
+import asyncio
+import re
+from pymongo import HASHED, IndexModel, TEXT
+from pydantic import Field, model_validator
+from typing import Annotated, Any, ClassVar
 from datetime import datetime
 from app.common.model import CommonDocument
+from app.conf.settings import settings
 from app.dtos.company import BaseCompany
 from app.dtos.company import BaseCompany
 
@@ -17,9 +20,51 @@ class Company(CommonDocument):
     name: str = Field(...)
     country: str = Field(...)
     address: str = Field(...)
+    search_ticker: str = Field(default="", description="Lowercased ticker, for case-insensitive prefix search.")
+    search_terms: list[str] = Field(default_factory=list, description="Lowercased words of the name, for prefix search.")
+
+    cache_tag_fields: ClassVar[tuple[str, ...]] = ("ticker",)
+    facet_fields: ClassVar[tuple[str, ...]] = ("country",)
+    shard_key: ClassVar[tuple[tuple[str, int | str], ...]] = (("ticker", HASHED),)
     
     class Settings:
         name = "companies"
+        indexes = [
+            IndexModel([("ticker", HASHED)]),
+            IndexModel([("ticker", 1), ("name", 1)]),
+            IndexModel([("name", 1), ("_id", 1)]),
+            IndexModel([("created_at", 1), ("_id", 1)]),
+            IndexModel([("search_ticker", 1)]),
+            IndexModel([("search_terms", 1)]),
+            IndexModel([("name", TEXT)]),
+        ]
+
+    @staticmethod
+    def search_fields(ticker: str, name: str) -> dict[str, Any]:
+        """
+        Compute the search keys derived from a ticker and a name.
+
+        Args:
+            ticker (str): The company ticker.
+            name (str): The company name.
+
+        Returns:
+            dict[str, Any]: `search_ticker` and `search_terms`, ready for `$set`.
+        """
+        return {
+            "search_ticker": ticker.lower(),
+            "search_terms": sorted(set(re.findall(r"\w+", name.lower()))),
+        }
+
+    @model_validator(mode="after")
+    def set_search_fields(self) -> "Company":
+        """
+            Keep the search keys in step with `ticker` and `name` whenever a document is built.
+        """
+        for field, value in self.search_fields(self.ticker, self.name).items():
+            if getattr(self, field) != value:
+                setattr(self, field, value)
+        return self
     
     @classmethod
     def from_dto(cls, data: BaseCompany) -> "Company":
@@ -62,16 +107,21 @@ class Company(CommonDocument):
         cls, 
         company_id: Annotated[int | None, "Company id"] = None, 
         ticker: Annotated[str | None, "Company ticker"] = None,
+        cached: bool = True,
     ) -> "Company | None":
         """
             Retrieve a company by its ID or ticker.
 
             This method searches for a company document in the database
-            using either the unique company ID or its ticker symbol.
+            using either the unique company ID or its ticker symbol. The ticker
+            is the shard key, so it is tried first and reaches a single shard;
+            the ID is only looked up, on every shard, when the ticker does not match.
 
             Args:
                 company_id (int): The ID of the company to retrieve.
                 ticker (str): The ticker symbol of the company to retrieve.
+                cached (bool): Serve the ticker lookup from the query cache. Write
+                    paths pass False, so they check and modify the current document.
 
             Returns:
                 BaseCompany | None: A DTO representing the company if found.
@@ -79,7 +129,78 @@ class Company(CommonDocument):
             Raises:
                 CompanyNotFoundException: If no company with the given ID or ticker exists.
         """
-        existing_company = await cls.find_one(
-            Or(cls.id == company_id, cls.ticker == ticker)
+        if ticker is not None:
+            existing_company = await cls.cached_load_one("ticker", ticker, settings.query_cache_ttl if cached else 0)
+            if existing_company or company_id is None:
+                return existing_company
+        if company_id is None:
+            return None
+        cls.record_targeting("get_company", {"_id": company_id})
+        return await cls.find_one(cls.id == company_id)
+    
+    @classmethod
+    async def get_company_fields(cls, ticker: str, fields: list[str]) -> dict[str, Any] | None:
+        """
+            Retrieve only some fields of a company by its ticker.
+
+            Args:
+                ticker (str): The ticker symbol of the company to retrieve.
+                fields (list[str]): The fields to return.
+
+            Returns:
+                dict[str, Any] | None: The projected company if found.
+        """
+        return await cls.cached_load_fields("ticker", ticker, fields, settings.query_cache_ttl)
+
+    @classmethod
+    async def search(cls, query: str, limit: int) -> list[dict[str, Any]]:
+        """
+            Search companies by ticker prefix, name word prefix or full text.
+
+            A single word is matched case-insensitively as a prefix of the ticker
+            and of any word of the name, using the `search_ticker` and
+            `search_terms` indexes; several words use the `name` text index.
+
+            Results are ranked: exact ticker, then ticker prefix, then name match
+            (by text score for full-text queries), ties broken by ticker.
+
+            Args:
+                query (str): The user's input.
+                limit (int): Maximum number of results.
+
+            Returns:
+                list[dict[str, Any]]: The matching companies, best first.
+        """
+        collection = cls.get_pymongo_collection()
+        projection = {"_id": 0, "ticker": 1, "name": 1, "country": 1, "address": 1}
+        words = re.findall(r"\w+", query.lower())
+        if not words:
+            return []
+
+        if len(words) > 1:
+            cls.record_targeting("search", {"$text": {"$search": " ".join(words)}})
+            cursor = collection.find(
+                {"$text": {"$search": " ".join(words)}},
+                {**projection, "score": {"$meta": "textScore"}}
+            ).sort([("score", {"$meta": "textScore"}), ("ticker", 1)]).limit(limit)
+            return [{key: value for key, value in doc.items() if key != "score"} async for doc in cursor]
+
+        prefix = {"$regex": f"^{re.escape(words[0])}"}
+        cls.record_targeting("search", {"search_ticker": prefix})
+        cls.record_targeting("search", {"search_terms": prefix})
+        by_ticker, by_name = await asyncio.gather(
+            collection.find({"search_ticker": prefix}, {**projection, "search_ticker": 1})
+                .sort("search_ticker", 1).limit(limit).to_list(),
+            collection.find({"search_terms": prefix}, {**projection, "search_ticker": 1})
+                .sort("search_terms", 1).limit(limit).to_list()
         )
-        return existing_company
\ No newline at end of file
+
+        ranked: dict[str, tuple[int, dict[str, Any]]] = {}
+        for rank, doc in (
+            *((0 if doc["search_ticker"] == words[0] else 1, doc) for doc in by_ticker),
+            *((2, doc) for doc in by_name),
+        ):
+            if doc["ticker"] not in ranked or rank < ranked[doc["ticker"]][0]:
+                ranked[doc["ticker"]] = (rank, doc)
+        results = sorted(ranked.values(), key=lambda item: (item[0], item[1]["ticker"]))
+        return [{key: value for key, value in doc.items() if key != "search_ticker"} for _, doc in results[:limit]]
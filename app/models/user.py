@@ -1,7 +1,9 @@
 from pydantic import Field, field_validator
-from beanie import before_event, Update
+from beanie import before_event, after_event, Update, Save, Replace, SaveChanges, Delete
 from datetime import datetime
 from app.common.model import CommonDocument
+from app.conf.principal import PrincipalCache
+from app.dtos.user import UserProfile
 
 class User(CommonDocument):
     """
@@ -27,6 +29,23 @@ class User(CommonDocument):
 
     class Settings:
         name = "users"
+
+    @classmethod
+    def to_profile(cls, user: "User") -> UserProfile:
+        """
+        Convert a User document into the profile snapshot embedded in Auth.
+
+        Args:
+            user (User): The User document instance to convert.
+
+        Returns:
+            UserProfile: The user's profile fields.
+        """
+        return UserProfile(
+            first_name=user.first_name,
+            last_name=user.last_name,
+            birthday=user.birthday
+        )
     
     @before_event(Update)
     async def capitalize_names(self):
@@ -42,5 +61,23 @@ class User(CommonDocument):
             self.first_name = self.first_name.capitalize()
         elif self.last_name:
             self.last_name = self.last_name.capitalize()
- 
-    
\ No newline at end of file
+
+    @after_event(Update, Save, Replace, SaveChanges)
+    async def sync_auth_profile(self):
+        """
+            Mirror the profile fields into the owning Auth document after a change.
+
+            Keeps the denormalized `Auth.profile` current so authenticated reads do not
+            need to fetch the linked User.
+        """
+        from .auth import Auth
+        await Auth.find_one({"user.$id": self.id}).update(
+            {"$set": {"profile": User.to_profile(self).model_dump()}}
+        )
+
+    @after_event(Update, Save, Replace, SaveChanges, Delete)
+    async def invalidate_principal(self):
+        """
+            Drop the cached principal that embeds this user after it changes or is deleted.
+        """
+        await PrincipalCache.invalidate(document_id=self.id)
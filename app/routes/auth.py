@@ -3,7 +3,7 @@ from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import ValidationError
 from typing import Annotated
 from datetime import timedelta
-from app.conf.security import PasswordService, AuthService, TokenService
+from app.conf.security import PasswordService, AuthService, TokenService, auth_dependency, oauth2_scheme
 from app.models.auth import Auth
 from app.models.user import User
 from app.dtos.auth import AuthCreate, Token
@@ -22,7 +22,7 @@ async def register(body: Annotated[AuthCreate, Body(...)]):
         
         user = User()
         await user.insert()
-        body.password = PasswordService.hash_password(body.password)
+        body.password = await PasswordService.hash_password(body.password)
         new_auth = Auth.from_dto(data=body, user=user)
         await new_auth.insert()
         response = ResponseDTO(
@@ -48,4 +48,10 @@ async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]) -> T
     except ValidationError as e:
         raise e
 
-        
\ No newline at end of file
+
+@auth_router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(token: Annotated[str, Depends(oauth2_scheme)], crr_auth: auth_dependency):
+    try:
+        await AuthService.revoke_token(token)
+    except ValidationError as e:
+        raise e
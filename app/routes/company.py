@@ -1,21 +1,176 @@
-from fastapi import APIRouter, status, Body, Query, Path
-from typing import Annotated
+import csv
+import io
+import json
+from fastapi import APIRouter, Depends, status, Body, Query, Path, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from typing import Annotated, Any, AsyncIterator, Literal, get_args
+from urllib.parse import urlencode
 from pydantic import ValidationError
 from datetime import datetime
 from app.models.company import Company
-from app.common.schema import ResponseDTO, PaginationResponseDTO
+from app.common.schema import ResponseDTO, PaginationResponseDTO, model_subset
 from app.common.criteria import Criteria, SortDTO, PaginationDTO, OrderBy
-from app.database.redis import RedisManager
-from app.dtos.company import CompanyCreate, CompanyUpdate, BaseCompany
-from app.exceptions.company import CompanyAlreadyExistsException, CompanyNotFoundException
+from app.common.response_cache import ResponseCache
+from app.common.warmup import CacheWarmer
+from app.common.streaming import BodyTooLargeError, RowError, iter_file, iter_json_array, iter_ndjson, spool
+from app.conf.settings import settings
+from app.dtos.company import CompanyCreate, CompanyUpdate, BaseCompany, CompanyField, CompanySortField
+from app.exceptions.company import BulkBodyTooLargeException, CompanyAlreadyExistsException, CompanyNotFoundException
 from app.conf.security import auth_dependency
-import json
+from app.database.read_options import read_from
 
 company_router = APIRouter(prefix="/api/companies", tags=["Company"])
 
-@company_router.post("/{company_ticker}", status_code=status.HTTP_200_OK, response_model=ResponseDTO[BaseCompany])
-async def get_company(company_ticker: Annotated[str, Path()]):
+# Routes that cache their results still fill the cache from the primary;
+# only their uncached reads (e.g. exports) reach the secondaries.
+read_heavy = [Depends(read_from(
+    settings.mongo_read_route_preference,
+    settings.mongo_read_route_concern,
+    settings.mongo_max_staleness_seconds
+))]
+
+async def _ingest(rows: AsyncIterator[Any]) -> AsyncIterator[str]:
+    summary = {"created": 0, "invalid": 0, "duplicate": 0, "error": 0}
+    chunk: list[tuple[int, CompanyCreate]] = []
+
+    async def flush() -> AsyncIterator[str]:
+        outcomes = await Company.bulk_insert([Company.from_dto(data=company) for _, company in chunk])
+        for (row, company), outcome in zip(chunk, outcomes):
+            result = "created" if outcome is None else "duplicate" if outcome == "duplicate" else "error"
+            summary[result] += 1
+            line = {"row": row, "status": result, "ticker": company.ticker}
+            if result == "error":
+                line["detail"] = outcome
+            yield json.dumps(line) + "\n"
+        chunk.clear()
+
+    row = 0
+    try:
+        async for value in rows:
+            row += 1
+            try:
+                if isinstance(value, RowError):
+                    raise value
+                chunk.append((row, CompanyCreate.model_validate(value)))
+            except (RowError, ValidationError) as e:
+                summary["invalid"] += 1
+                detail = e.errors(include_url=False, include_context=False, include_input=False) if isinstance(e, ValidationError) else str(e)
+                yield json.dumps({"row": row, "status": "invalid", "detail": detail}) + "\n"
+                continue
+            if len(chunk) >= settings.bulk_insert_chunk_size:
+                async for line in flush():
+                    yield line
+    except ValueError as e:
+        summary["aborted"] = str(e)
+    if chunk:
+        async for line in flush():
+            yield line
+    yield json.dumps({"summary": summary}) + "\n"
+
+async def _export_rows(criteria: Criteria, hint: str | None, export_format: str) -> AsyncIterator[str]:
+    fields = criteria.fields or []
+    if export_format == "ndjson":
+        lines = []
+        async for document in Company.stream(criteria, settings.export_batch_size, hint):
+            lines.append(json.dumps(document, default=str) + "\n")
+            if len(lines) >= settings.export_batch_size:
+                yield "".join(lines)
+                lines.clear()
+        yield "".join(lines)
+        return
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    rows = 0
+    async for document in Company.stream(criteria, settings.export_batch_size, hint):
+        writer.writerow(document)
+        rows += 1
+        if rows % settings.export_batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+@company_router.get("/export", status_code=status.HTTP_200_OK, dependencies=read_heavy)
+async def export_companies(
+    crr_auth: auth_dependency,
+    export_format: Annotated[Literal["ndjson", "csv"], Query(alias="format", description="Output format")] = "ndjson",
+    sort: Annotated[CompanySortField, Query(description="Indexed field to sort by")] = "ticker",
+    order: Annotated[Literal["asc", "desc"], Query(description="Sort direction")] = "asc",
+    start_date: Annotated[datetime | None, Query()] = None,
+    end_date: Annotated[datetime | None, Query()] = None,
+    fields: Annotated[list[CompanyField] | None, Query(description="Fields to export, in column order; all when omitted")] = None,
+):
+    criteria = Criteria(
+        pagination=PaginationDTO(start_date=start_date, end_date=end_date),
+        sort_by=SortDTO(field=sort, order=OrderBy.ASC if order == "asc" else OrderBy.DESC),
+        fields=list(dict.fromkeys(fields or get_args(CompanyField)))
+    )
+    # Planned before the response starts, so a rejected shape is a 400, not a cut-off 200.
+    criteria = await Company.resolve_sort(criteria)
+    _, hint = await Company.plan(criteria)
+    media_type = "application/x-ndjson" if export_format == "ndjson" else "text/csv"
+    return StreamingResponse(
+        _export_rows(criteria, hint, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="companies.{export_format}"'}
+    )
+
+@company_router.get("/search", status_code=status.HTTP_200_OK, response_model=ResponseDTO[list[BaseCompany]], dependencies=read_heavy)
+async def search_companies(
+    q: Annotated[str, Query(min_length=1, max_length=50, description="Ticker or name prefix, or words of the name")],
+    limit: Annotated[int, Query(gt=0, le=50, description="Maximum number of results")] = 10,
+):
+    query = " ".join(q.lower().split())
+
+    async def build() -> ResponseDTO[list[BaseCompany]]:
+        results = await Company.search(query, limit)
+        return ResponseDTO[list[BaseCompany]](
+            message="Company search results",
+            status_code=status.HTTP_200_OK,
+            data=results
+        )
+
+    return await ResponseCache.get_or_build(
+        Company.get_collection_name(),
+        {"op": "search", "q": query, "limit": limit},
+        [Company.collection_tag()],
+        build,
+        settings.search_cache_ttl
+    )
+
+@company_router.get("/facets/{field}", status_code=status.HTTP_200_OK, response_model=ResponseDTO[dict[str, int]])
+async def get_company_facets(field: Annotated[Literal["country"], Path(description="Faceted field")]):
+    counts = await Company.facet_counts(field)
+    return ResponseDTO(message=f"Companies by {field}", status_code=status.HTTP_200_OK, data=counts)
+
+@company_router.post("/bulk", status_code=status.HTTP_200_OK)
+async def bulk_create_companies(request: Request, crr_auth: auth_dependency):
+    content_type = request.headers.get("content-type", "")
+    parse = iter_json_array if content_type.startswith("application/json") else iter_ndjson
+    try:
+        body = await spool(request.stream(), settings.bulk_spool_memory_bytes, settings.bulk_max_body_bytes)
+    except BodyTooLargeError:
+        raise BulkBodyTooLargeException(settings.bulk_max_body_bytes)
+    rows = parse(iter_file(body), settings.bulk_max_row_bytes)
+    return StreamingResponse(_ingest(rows), media_type="application/x-ndjson", background=BackgroundTask(body.close))
+
+@company_router.post("/{company_ticker}", status_code=status.HTTP_200_OK, response_model=ResponseDTO[BaseCompany], dependencies=read_heavy)
+async def get_company(
+    company_ticker: Annotated[str, Path()],
+    fields: Annotated[list[CompanyField] | None, Query(description="Fields to return; all when omitted")] = None,
+):
     try:
+        if fields:
+            projected = await Company.get_company_fields(ticker=company_ticker, fields=fields)
+            if not projected:
+                raise CompanyNotFoundException()
+            company = model_subset(BaseCompany, tuple(sorted(set(fields)))).model_validate(projected)
+            response = ResponseDTO(message="Company result", status_code=status.HTTP_200_OK, data=company)
+            return Response(content=response.model_dump_json(), media_type="application/json")
+
         existing_company = await Company.get_company(ticker=company_ticker)
         if not existing_company:
             raise CompanyNotFoundException()
@@ -25,56 +180,86 @@ async def get_company(company_ticker: Annotated[str, Path()]):
     except ValidationError as e:
         raise e
 
-@company_router.get("/", status_code=status.HTTP_200_OK, response_model=ResponseDTO[list[BaseCompany]])
+def _page_link(params: dict[str, Any], cursor: str | None) -> str | None:
+    if not cursor:
+        return None
+    query = {
+        name: value.isoformat() if isinstance(value, datetime) else str(value).lower() if isinstance(value, bool) else value
+        for name, value in params.items()
+        if value is not None
+    }
+    query["cursor"] = cursor
+    return f"{company_router.prefix}/?{urlencode(query, doseq=True)}"
+
+@company_router.get("/", status_code=status.HTTP_200_OK, response_model=ResponseDTO[list[BaseCompany]], dependencies=read_heavy)
 async def get_companies(
     limit: Annotated[int, Query(gt=0, le=100, description="Number of companies per page")] = 5,
-    cursor: Annotated[str | None, Query(description="Last ticker from the previous page")] = None,
+    cursor: Annotated[str | None, Query(description="Opaque `next_cursor` or `prev_cursor` of another page")] = None,
+    sort: Annotated[CompanySortField, Query(description="Indexed field to sort by")] = "ticker",
+    order: Annotated[Literal["asc", "desc"], Query(description="Sort direction")] = "asc",
     start_date: Annotated[datetime | None, Query()] = None,
     end_date: Annotated[datetime | None, Query()] = None,
+    with_total: Annotated[bool, Query(description="Count the matching companies; disable to skip the count")] = True,
+    fields: Annotated[list[CompanyField] | None, Query(description="Fields to return; all when omitted")] = None,
 ):
     try:
-        cache_key = f"companies:{cursor}:{limit}:{start_date}:{end_date}"
-        redis_client = await RedisManager.get_client()
-
-        cached = await redis_client.get(cache_key)
-        if cached:
-            return ResponseDTO.model_validate_json(cached)
-
         criteria = Criteria(
             pagination=PaginationDTO(
                 cursor=cursor,
-                cursor_name="ticker",
                 start_date=start_date,
                 end_date=end_date,
                 limit=limit
             ),
-            sort_by=SortDTO(field="ticker", order=OrderBy.ASC)
-        )
-        companies = await Company.paginate(criteria=criteria, cursor_name="ticker")
+            sort_by=SortDTO(field=sort, order=OrderBy.ASC if order == "asc" else OrderBy.DESC),
+            fields=sorted(set(fields)) if fields else None
+        ).normalized(settings.query_cache_date_bucket)
+        params = {
+            "limit": limit,
+            "sort": sort,
+            "order": order,
+            "start_date": criteria.pagination.start_date,
+            "end_date": criteria.pagination.end_date,
+            "with_total": with_total,
+            "fields": criteria.fields
+        }
+        await CacheWarmer.record("companies:page", {**params, "cursor": cursor}, settings.cache_warmup_sample_rate)
 
-        pagination = PaginationResponseDTO(
-            limit=limit,
-            total=companies["total"],
-            next_cursor=companies["next_cursor"],
-        )
-        response = ResponseDTO(
-            message="Companies page",
-            status_code=status.HTTP_200_OK,
-            data=companies["result"],
-            pagination=pagination
-        )
+        item_model = model_subset(BaseCompany, tuple(criteria.fields)) if criteria.fields else BaseCompany
 
-        await redis_client.set(cache_key, response.model_dump_json(), ex=60)
+        async def build() -> ResponseDTO[list[BaseCompany]]:
+            companies = await Company.paginate(criteria=criteria, with_total=with_total)
+            pagination = PaginationResponseDTO(
+                limit=limit,
+                total=companies["total"],
+                next_cursor=companies["next_cursor"],
+                prev_cursor=companies["prev_cursor"],
+                next_link=_page_link(params, companies["next_cursor"]),
+                prev_link=_page_link(params, companies["prev_cursor"]),
+            )
+            return ResponseDTO[list[item_model]](
+                message="Companies page",
+                status_code=status.HTTP_200_OK,
+                data=companies["result"],
+                pagination=pagination
+            )
 
-        return response
+        return await ResponseCache.get_or_build(
+            Company.get_collection_name(),
+            {"op": "page", "criteria": criteria.cache_key(), "with_total": with_total},
+            [Company.collection_tag()],
+            build,
+            settings.query_cache_ttl
+        )
 
     except ValidationError as e:
         raise e
 
+CacheWarmer.register("companies:page", get_companies)
+
 @company_router.post("/", status_code=status.HTTP_201_CREATED, response_model=ResponseDTO[CompanyCreate])
 async def create_company(body: Annotated[CompanyCreate, Body()], crr_auth: auth_dependency):
     try:
-        existing_company = await Company.get_company(ticker=body.ticker)
+        existing_company = await Company.get_company(ticker=body.ticker, cached=False)
         if existing_company:
             raise CompanyAlreadyExistsException()
         new_company = Company.from_dto(data=body)
@@ -88,16 +273,19 @@ async def create_company(body: Annotated[CompanyCreate, Body()], crr_auth: auth_
 @company_router.patch("/{company_ticker}", status_code=status.HTTP_200_OK, response_model=ResponseDTO)
 async def update_company(body: Annotated[CompanyUpdate, Body()], company_ticker: Annotated[str, Path()], crr_auth: auth_dependency):
     try:
-        existing_company = await Company.get_company(ticker=company_ticker)
+        existing_company = await Company.get_company(ticker=company_ticker, cached=False)
         if not existing_company:
             raise CompanyAlreadyExistsException()
         
+        ticker = body.ticker if body.ticker else existing_company.ticker
+        name = body.name if body.name else existing_company.name
         await existing_company.update({
             "$set": {
-                Company.ticker: body.ticker if body.ticker else existing_company.ticker,
-                Company.name: body.name if body.name else existing_company.name,
+                Company.ticker: ticker,
+                Company.name: name,
                 Company.country: body.country if body.country else existing_company.country,
-                Company.address: body.address if body.address else existing_company.address
+                Company.address: body.address if body.address else existing_company.address,
+                **Company.search_fields(ticker, name)
             }
         })
         response = ResponseDTO(message="Company updated successfully", status_code=status.HTTP_200_OK)
@@ -108,7 +296,7 @@ async def update_company(body: Annotated[CompanyUpdate, Body()], company_ticker:
 @company_router.delete("/{company_ticker}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_company(company_ticker: Annotated[str, Path()], crr_auth: auth_dependency):
     try:
-        existing_company = await Company.get_company(ticker=company_ticker)
+        existing_company = await Company.get_company(ticker=company_ticker, cached=False)
         if not existing_company:
             raise CompanyNotFoundException()
         await existing_company.delete()
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, status
+from typing import Any
+from app.common.model import CommonDocument
+from app.common.query_cache import QueryCache
+from app.common.schema import ResponseDTO
+from app.common.sharding import ShardTargeting
+from app.conf.hashing import PasswordHasherPool
+from app.conf.principal import PrincipalCache
+from app.conf.revocation import RevocationService
+from app.conf.security import auth_dependency, TokenService
+from app.database.mongo import MongoDB
+
+metrics_router = APIRouter(prefix="/api/metrics", tags=["Metrics"])
+
+@metrics_router.get("/", status_code=status.HTTP_200_OK, response_model=ResponseDTO[dict[str, Any]])
+async def get_metrics(crr_auth: auth_dependency):
+    metrics = {
+        "password_hasher": PasswordHasherPool.stats(),
+        "principal_cache": PrincipalCache.stats(),
+        "token_cache": TokenService.stats(),
+        "revocation": RevocationService.stats(),
+        "loaders": CommonDocument.loader_stats(),
+        "query_cache": QueryCache.stats(),
+        "mongo_pools": MongoDB.pool_stats(),
+        "shard_targeting": ShardTargeting.stats(),
+    }
+    return ResponseDTO(message="Worker metrics", status_code=status.HTTP_200_OK, data=metrics)
@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Body, status
+from fastapi import APIRouter, Body, Depends, status
 from pydantic import ValidationError
 from typing import Annotated
 from app.dtos.user import UserUpdate
 from app.common.schema import ResponseDTO
-from app.conf.security import auth_dependency
+from app.conf.security import AuthService, auth_dependency, oauth2_scheme
 from app.models.user import User
 from app.exceptions.user import UserNotFoundException
 
@@ -12,7 +12,7 @@ user_router = APIRouter(prefix="/api/users", tags=["User"])
 @user_router.patch("/", status_code=status.HTTP_200_OK, response_model=ResponseDTO)
 async def update_user(body: Annotated[UserUpdate, Body()], crr_auth: auth_dependency):
     try:
-        user = await User.get(crr_auth.user.id) # type: ignore
+        user = await User.load_one("_id", crr_auth.user_id)
         if not user:
             raise UserNotFoundException()
 
@@ -30,8 +30,9 @@ async def update_user(body: Annotated[UserUpdate, Body()], crr_auth: auth_depend
         raise e
 
 @user_router.delete("/", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_user(crr_auth: auth_dependency):
+async def delete_user(token: Annotated[str, Depends(oauth2_scheme)], crr_auth: auth_dependency):
     try:
         await crr_auth.delete()
+        await AuthService.revoke_token(token)
     except ValidationError as e:
         raise e
\ No newline at end of file
@@ -0,0 +1,29 @@
+import os
+import pytest
+
+# Settings are read at import time; the tests never reach these services.
+for name, value in {
+    "SECRET_KEY": "test",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "MONGO_DB_URI": "mongodb://localhost:27017/test",
+    "REDIS_URL": "redis://localhost:6379/0",
+}.items():
+    os.environ.setdefault(name, value)
+
+from app.common.query_cache import QueryCache  # noqa: E402
+from app.database.redis import RedisManager  # noqa: E402
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Point RedisManager at an in-memory Redis and start from an empty L1."""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # Lua scripting, for the cache lock
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(RedisManager, "_client", fakeredis.FakeAsyncRedis(server=server, decode_responses=True))
+    monkeypatch.setattr(RedisManager, "_binary_client", fakeredis.FakeAsyncRedis(server=server))
+    QueryCache._entries.clear()
+    QueryCache._tags.clear()
+    yield server
+    QueryCache._entries.clear()
+    QueryCache._tags.clear()
@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+from app.commands.explain_shapes import company_shapes
+from app.common import model
+from app.models.company import Company
+
+def declared_indexes() -> dict[str, dict]:
+    """Return what `index_information()` reports once the declared indexes are synced."""
+    indexes = {
+        "_id_": {"key": [("_id", 1)]},
+        "ticker_1": {"key": [("ticker", 1)], "unique": True},
+    }
+    for index in Company.Settings.indexes:
+        document = index.document
+        indexes[document["name"]] = {"key": list(document["key"].items())}
+    return indexes
+
+class FakeCollection:
+    def __init__(self, indexes: dict[str, dict]) -> None:
+        self.indexes = indexes
+        self.loads = 0
+
+    async def index_information(self) -> dict[str, dict]:
+        self.loads += 1
+        return dict(self.indexes)
+
+@pytest.fixture
+def collection(monkeypatch):
+    fake = FakeCollection(declared_indexes())
+    monkeypatch.setattr(Company, "get_pymongo_collection", classmethod(lambda cls: fake))
+    monkeypatch.setattr(Company, "get_collection_name", classmethod(lambda cls: "companies"))
+    Company.forget_indexes()
+    yield fake
+    Company.forget_indexes()
+
+@pytest.mark.parametrize("name", list(company_shapes()))
+def test_planned_shapes_use_an_index(collection, name):
+    async def scenario():
+        criteria = await Company.resolve_sort(company_shapes()[name])
+        return await Company.plan(criteria)
+
+    _, hint = asyncio.run(scenario())
+    keys = asyncio.run(Company.index_keys())
+    assert hint in keys, f"no index serves {name!r}"
+
+def test_index_list_is_reused_until_forgotten(collection):
+    async def scenario():
+        await Company.index_keys()
+        await Company.index_keys()
+        Company.forget_indexes()
+        await Company.index_keys()
+
+    asyncio.run(scenario())
+    assert collection.loads == 2
+
+def test_index_list_expires(collection, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(model.settings, "index_cache_ttl", 60)
+    monkeypatch.setattr("app.common.cache.time.monotonic", lambda: now[0])
+
+    asyncio.run(Company.index_keys())
+    now[0] += 61
+    asyncio.run(Company.index_keys())
+    assert collection.loads == 2
+
+def test_replan_skips_a_dropped_index(collection):
+    criteria = company_shapes()["by name, next page"]
+
+    async def scenario():
+        _, hint = await Company.plan(criteria)
+        del collection.indexes[hint]
+        return hint, await Company.replan(criteria)
+
+    dropped, replanned = asyncio.run(scenario())
+    assert replanned != dropped
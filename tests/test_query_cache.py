@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+from app.common import query_cache
+from app.common.query_cache import QueryCache
+from app.database.read_options import current_read_options, reading
+
+pytestmark = pytest.mark.usefixtures("fake_redis")
+
+def counting_loader():
+    calls = []
+
+    async def loader():
+        calls.append(None)
+        return {"calls": len(calls)}
+
+    return loader, calls
+
+async def settle() -> None:
+    while QueryCache._refreshing:
+        await asyncio.gather(*QueryCache._refreshing)
+
+def test_early_refresh_calls_the_loader_again(monkeypatch):
+    async def scenario():
+        loader, calls = counting_loader()
+        first = await QueryCache.get_or_set("items", {"page": 1}, ["items"], loader, ttl=60)
+
+        # Make XFetch fire on the next hit, while the entry is still fresh.
+        with monkeypatch.context() as patch:
+            patch.setattr(query_cache.settings, "query_cache_early_refresh_beta", 1e12)
+            served = await QueryCache.get_or_set("items", {"page": 1}, ["items"], loader, ttl=60)
+        await settle()
+
+        refreshed = await QueryCache.get_or_set("items", {"page": 1}, ["items"], loader, ttl=60)
+        return first, served, refreshed, calls
+
+    first, served, refreshed, calls = asyncio.run(scenario())
+    assert first == served == {"calls": 1}
+    assert len(calls) == 2
+    assert refreshed == {"calls": 2}
+
+def test_refresh_uses_a_newer_entry_stored_by_another_worker():
+    async def scenario():
+        loader, calls = counting_loader()
+        await QueryCache.get_or_set("items", {"page": 1}, ["items"], loader, ttl=60)
+        key = await QueryCache._entry_key("items", {"page": 1}, ["items"])
+        header, _ = QueryCache._entries.get(key)
+        load = query_cache._Load(loader, 60, 0, "value")
+
+        # Another worker refreshed the entry after this one last read it.
+        await QueryCache._single_flight(key, load, header["soft_expires_at"] - 1)
+        return calls
+
+    assert len(asyncio.run(scenario())) == 1
+
+def test_loader_reads_from_the_primary_on_secondary_routes():
+    async def scenario():
+        seen = []
+
+        async def loader():
+            seen.append(current_read_options())
+            return {}
+
+        with reading("secondaryPreferred", "majority", 90):
+            await QueryCache.get_or_set("items", {"page": 1}, ["items"], loader, ttl=60)
+        return seen
+
+    (options,) = asyncio.run(scenario())
+    assert (options.preference, options.concern) == ("primary", "majority")
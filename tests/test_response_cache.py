@@ -0,0 +1,44 @@
+import asyncio
+import pytest
+from fastapi import Response
+from pydantic import BaseModel
+from app.common.query_cache import QueryCache
+from app.common.response_cache import ResponseCache
+
+pytestmark = pytest.mark.usefixtures("fake_redis")
+
+class Body(BaseModel):
+    name: str
+
+def test_hit_keeps_status_and_headers():
+    async def build() -> Response:
+        return Response(
+            content=Body(name="acme").model_dump_json(),
+            status_code=203,
+            headers={"Cache-Control": "max-age=60"},
+            media_type="application/json"
+        )
+
+    async def scenario():
+        first = await ResponseCache.get_or_build("items", {"id": 1}, ["items"], build, 60)
+        QueryCache._entries.clear()
+        second = await ResponseCache.get_or_build("items", {"id": 1}, ["items"], build, 60)
+        return first, second
+
+    for response in asyncio.run(scenario()):
+        assert response.status_code == 203
+        assert response.headers["cache-control"] == "max-age=60"
+        assert response.headers.getlist("content-type") == ["application/json"]
+        assert response.headers["content-length"] == str(len(b'{"name":"acme"}'))
+        assert response.body == b'{"name":"acme"}'
+
+def test_model_is_sent_with_the_given_status():
+    async def build() -> Body:
+        return Body(name="acme")
+
+    response = asyncio.run(
+        ResponseCache.get_or_build("items", {"id": 2}, ["items"], build, 60, status_code=202, headers={"X-Source": "cache"})
+    )
+    assert response.status_code == 202
+    assert response.headers["x-source"] == "cache"
+    assert response.body == b'{"name":"acme"}'